@@ -0,0 +1,152 @@
+import json
+import threading
+import time
+
+from typing import List, Optional, Tuple
+
+import googleapiclient
+
+from RequestExecutor import RequestExecutor
+
+"""
+
+Streams slide change requests to the Slides API on a background thread while the slides are still being laid out.
+Requests are sent as batchUpdate chunks bounded by request count and serialized size, strictly in submission order.
+
+Each chunk requires the revision returned by the previous chunk (writeControl.requiredRevisionId),
+so a chunk can never be applied out of order or on top of an unexpected edit, nor twice when it is retried.
+When no revision is given (i.e., the presentation came from the template manifest), it is read before the first chunk.
+
+"""
+
+
+class CommitPipeline:
+    def __init__(self, slideService: googleapiclient.discovery.Resource, presentationID: str, revisionID: Optional[str],
+                 maxRequests: int, maxBytes: int) -> None:
+        self.slideService = slideService
+        self.presentationID = presentationID
+        self.revisionID = revisionID
+        self.maxRequests = maxRequests
+        self.maxBytes = maxBytes
+
+        # Requests waiting to be sent, along with their serialized size
+        self.pendingRequests: List[dict] = []
+        self.pendingSizes: List[int] = []
+        self.condition = threading.Condition()
+        self.closed = False
+        self.worker: Optional[threading.Thread] = None
+
+        # Results since the last join(); (request count, bytes, latency in seconds) per chunk
+        self.committedRequests: List[dict] = []
+        self.chunkStats: List[Tuple[int, int, float]] = []
+        self.failed = False
+
+    # ==========================================================================================
+    # ========================================= CONTROLS =======================================
+    # ==========================================================================================
+
+    def submit(self, requests: List[dict]) -> None:
+        # Queue requests for sending, the background sender is started on demand
+        if not requests:
+            return
+
+        with self.condition:
+            if self.failed:
+                return
+            self.pendingRequests.extend(requests)
+            self.pendingSizes.extend(len(json.dumps(request)) for request in requests)
+            self.condition.notify()
+
+        if self.worker is None:
+            self.closed = False
+            self.worker = threading.Thread(target=self._run, daemon=True)
+            self.worker.start()
+
+    def join(self) -> Tuple[bool, List[dict], List[Tuple[int, int, float]]]:
+        # Wait for every submitted request to be sent; returns (success, committed requests, chunk statistics)
+        if self.worker is not None:
+            with self.condition:
+                self.closed = True
+                self.condition.notify()
+            self.worker.join()
+            self.worker = None
+
+        result = (not self.failed, self.committedRequests, self.chunkStats)
+
+        self.committedRequests = []
+        self.chunkStats = []
+        self.failed = False
+
+        return result
+
+    # ==========================================================================================
+    # ========================================== SENDER ========================================
+    # ==========================================================================================
+
+    def _run(self) -> None:
+        while True:
+            with self.condition:
+                while not self.pendingRequests and not self.closed:
+                    self.condition.wait()
+
+                if not self.pendingRequests:
+                    return
+
+                chunk, chunkBytes = self._popChunk()
+
+            if not self._sendChunk(chunk, chunkBytes):
+                with self.condition:
+                    # Later chunks would be applied on top of an incomplete presentation
+                    self.failed = True
+                    self.pendingRequests = []
+                    self.pendingSizes = []
+
+    def _popChunk(self) -> Tuple[List[dict], int]:
+        # Take as many pending requests as the limits allow, at least one
+        count = 0
+        chunkBytes = 0
+        while count < len(self.pendingRequests) and count < self.maxRequests:
+            if count > 0 and chunkBytes + self.pendingSizes[count] > self.maxBytes:
+                break
+            chunkBytes += self.pendingSizes[count]
+            count += 1
+
+        chunk = self.pendingRequests[:count]
+        del self.pendingRequests[:count]
+        del self.pendingSizes[:count]
+
+        return (chunk, chunkBytes)
+
+    def _sendChunk(self, chunk: List[dict], chunkBytes: int) -> bool:
+        if not self.revisionID:
+            self.revisionID = self._getRevisionID()
+
+        body: dict = {"requests": chunk}
+        if self.revisionID:
+            body["writeControl"] = {"requiredRevisionId": self.revisionID}
+
+        start = time.perf_counter()
+        try:
+            # Retrying a chunk that was applied without a response fails on the revision check instead of applying twice;
+            # without a revision, the chunk is only retried when it surely was not applied
+            response = RequestExecutor.execute(self.slideService.presentations().batchUpdate(
+                presentationId=self.presentationID, body=body), "slides", write=True, idempotent=bool(self.revisionID))
+        except Exception as error:
+            # Also covers connection errors left after retrying, which would otherwise silently end the sender
+            print(f"\tERROR : An error occurred on committing slide changes; {error}")
+            return False
+
+        self.chunkStats.append((len(chunk), chunkBytes, time.perf_counter() - start))
+        self.committedRequests.extend(chunk)
+        self.revisionID = response.get("writeControl", {}).get("requiredRevisionId", self.revisionID)
+
+        return True
+
+    def _getRevisionID(self) -> Optional[str]:
+        # Current revision of the presentation, None if it cannot be read
+        try:
+            return RequestExecutor.execute(self.slideService.presentations().get(
+                presentationId=self.presentationID, fields="revisionId"), "slides").get("revisionId")
+        except Exception as error:
+            print(f"\tWARNING : Presentation revision could not be read, committing without a revision check; {error}")
+            return None
@@ -1,23 +1,34 @@
 from __future__ import print_function
 
+import concurrent.futures
 import configparser
+import hashlib
+import json
 import os.path
 import datetime
 import webbrowser
 import googleapiclient
 import pytz
+import re
+import shutil
+import sqlite3
+import threading
+import time
 
-from typing import Dict, List, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from datetime import timedelta
 from googleapiclient.http import MediaIoBaseDownload
-from googleapiclient.discovery import build
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
 from apiclient import errors
 from enum import Enum
 
+from CommitPipeline import CommitPipeline
+from GoogleSession import GoogleSession
+from HymnDatabase import HymnDatabase
+from HymnDatabaseDelta import HymnDatabaseDelta
 from Logging import Logging
+from PresentationModel import PresentationModel
+from RequestExecutor import RequestExecutor
+from RequestOptimizer import RequestOptimizer
 
 """
 
@@ -33,12 +44,26 @@ class GoogleAPITools:
         Full = 0
         Short = 1
 
-    def __init__(self, type: str) -> None:
-        # If modifying these scopes, delete the file token.json.
-        self.scope = ["https://www.googleapis.com/auth/presentations",
-                      "https://www.googleapis.com/auth/spreadsheets",
-                      "https://www.googleapis.com/auth/drive"]
+    # Files kept up to date from Google Drive by updateData()
+    DataTypeList = ["HymnDatabase", "ProjectedSlideProperties", "RegularSlideProperties", "StreamSlideProperties"]
+    DataFileNameList = ["HymnDatabase.db", "ProjectedSlideProperties.ini", "RegularSlideProperties.ini", "StreamSlideProperties.ini"]
+
+    # MD5 checksums of the local data files, as {file name: {"md5", "size", "mtime"}}; the size and modified time
+    # tell whether the checksum still belongs to the file. A database updated from a changeset is recorded with the
+    # checksum of the Drive file it matches in content
+    DataChecksumPath = "Data/DataChecksums.json"
+    dataChecksumLock = threading.Lock()
+
+    # Google Drive changes feed cursor, marks the point up to which the data files are known to be up to date
+    DataChangeTokenPath = "Data/DriveChangeToken.txt"
 
+    # Partial response field mask for presentations().get(); only what the presentation model and getters read.
+    # Text and paragraph styles are needed to skip style fields already set by the template (see RequestOptimizer)
+    TextFields = "textElements(textRun(content,style),paragraphMarker(style))"
+    PresentationFields = (f"revisionId,slides(objectId,pageElements(objectId,shape(text({TextFields})),"
+                          f"table(rows,columns,tableRows(tableCells(text({TextFields}))))))")
+
+    def __init__(self, type: str) -> None:
         # Get access to the slide, sheet, and drive
         [self.slideService, self.sheetService, self.driveService] = self.getAPIServices()
 
@@ -48,8 +73,19 @@ class GoogleAPITools:
         self.globalConfig = configparser.ConfigParser()
         self.globalConfig.read("Data/GlobalProperties.ini")
 
-        # Update local hymn database and slide properties from Google Drive
-        self.updateData()
+        # Start up phases run on a thread pool; only the phases the new presentation depends on are waited for
+        self.startupTime = time.perf_counter()
+        startupExecutor = concurrent.futures.ThreadPoolExecutor(max_workers=len(GoogleAPITools.DataTypeList) + 2)
+
+        # Get rid of previously made slides in the background; the list is taken first, as the new presentation is added to it
+        previousSlideIDList = self.takePreviousSlideIDList()
+        startupExecutor.submit(self._runPhase, "Previous slide removal", self.removeSlideFiles, previousSlideIDList)
+
+        # Update local hymn database and slide properties from Google Drive; their metadata is fetched in a single batch
+        dataFileMetadata = self._runPhase("Data file lookup", self.getDataFileMetadata)
+        updateFutures = [startupExecutor.submit(self._runPhase, f"{dataType} update", self.updateDataFile, dataType, fileName, dataFileMetadata.get(dataType))
+                         for dataType, fileName in zip(GoogleAPITools.DataTypeList, GoogleAPITools.DataFileNameList)]
+        updateFutures[GoogleAPITools.DataTypeList.index(type + "SlideProperties")].result()
 
         # The ID of the source slide.
         if not os.path.exists("Data/" + type + "SlideProperties.ini"):
@@ -58,81 +94,181 @@ class GoogleAPITools:
         config.read("Data/" + type + "SlideProperties.ini")
         self.sourceSlideID = config["SLIDE_PROPERTIES"][type + "SourceSlideID"]
 
-        # Get rid of previously made slides
-        self.removePreviousSlides()
+        # Keep a spare copy of the source presentation per type, made in the background after each run
+        self.type = type
+        self.copyPoolEnabled = self.globalConfig.getboolean("SLIDE_API_SETTINGS", "CopyPoolEnabled", fallback=False)
+
+        # The source revision is looked up alongside the copy, unless a spare copy is to be claimed
+        revisionFuture = startupExecutor.submit(self._runPhase, "Source revision lookup", self.getSourceRevisionID)
+        self.sourceRevisionID = revisionFuture.result() if self.copyPoolEnabled else None
 
         # Generate new slide and save its ID
-        self.newSlideID = self.getDuplicatePresentation(type)
+        self.newSlideID = self._runPhase("Presentation copy", self.getDuplicatePresentation, type)
+
+        # Slide data of the source presentation, valid while the source is unchanged; copies keep the object IDs
+        self.templateManifestPath = "Data/" + type + "TemplateManifest.json"
+        self.sourceRevisionID = revisionFuture.result()
+        templateManifest = self.loadTemplateManifest(self.sourceRevisionID)
 
         # Slide change requests are appended here
         self.requests: List[dict] = []
 
-        # Get access to slide data
-        self.presentation = self.slideService.presentations().get(
-            presentationId=self.newSlideID).execute()
+        # Request counts before and after optimization, since the last commit
+        self.requestCount = 0
+        self.optimizedRequestCount = 0
+
+        # Re-download the presentation after each commit to check the local presentation model
+        self.verifyPresentationModel = self.globalConfig.getboolean("SLIDE_API_SETTINGS", "VerifyPresentationModel", fallback=False)
+
+        # Get access to slide data; kept up to date locally from the committed requests.
+        # The copy's revision is unknown when read from the manifest, the commit pipeline reads it before its first commit
+        if templateManifest is not None:
+            self.presentationModel = PresentationModel(templateManifest["presentation"])
+            self.slideIndex = templateManifest["slideIndex"]
+        else:
+            self.presentationModel = PresentationModel(self._runPhase("Presentation fetch", self.fetchPresentation))
+            self.slideIndex = self.buildSlideIndex(self.presentationModel)
+            self.saveTemplateManifest(self.sourceRevisionID)
+
+        # Slide data lookup by slide index and object ID; rebuilt once per revision of the presentation model
+        self.slideIndexRevision = self.presentationModel.revision
+
+        # Slide order once every request made so far is applied; used to plan slide moves
+        self.plannedSlideOrder = self.presentationModel.getSlideIDList()
+
+        # Sends flushed requests in bounded chunks while the remaining slides are being laid out
+        self.commitPipeline = CommitPipeline(self.slideService, self.newSlideID, self.presentationModel.presentation.get("revisionId"),
+                                             maxRequests=self.globalConfig.getint("SLIDE_API_SETTINGS", "BatchUpdateMaxRequests", fallback=500),
+                                             maxBytes=self.globalConfig.getint("SLIDE_API_SETTINGS", "BatchUpdateMaxBytes", fallback=1000000))
 
         # For creating unique IDs in duplicateSlide()
         self.dupIDCounter = 0
 
+        # Fill text placeholders (i.e., "{Title}") of duplicated slides with "replaceAllText" instead of rewriting the text box
+        self.placeholderFillMode = self.globalConfig.get("SLIDE_API_SETTINGS", "PlaceholderFillMode", fallback="Rewrite")
+
+        # Duplicated object ID to its (source object ID, duplicated slide ID), and duplicated objects with a filled placeholder
+        self.duplicateSourceMap: Dict[str, Tuple[str, str]] = {}
+        self.filledObjectIDs: set = set()
+
+        # The hymn database must be up to date before it is read; the slide removal is left to finish on its own
+        self.saveDataChangeToken(all([future.result() for future in updateFutures]))
+        HymnDatabase.setSynced()
+        startupExecutor.shutdown(wait=False)
+        print(f"\tINFO : Start up took {time.perf_counter() - self.startupTime:.2f} seconds.")
+
     # ==========================================================================================
     # ======================================= API TOOLS ========================================
     # ==========================================================================================
 
-    def getAPIServices(self) -> List[googleapiclient.discovery.Resource]:
-        # Refer to https://developers.google.com/slides/api/quickstart/python
-        creds = None
-        # The file token.pickle stores the user's access and refresh tokens, and is
-        # created automatically when the authorization flow completes for the first
-        # time.
-        if os.path.exists("Data/token.pickle"):
-            try:
-                creds = Credentials.from_authorized_user_file("Data/token.pickle", self.scope)
-            except Exception as error:
-                print(f"\tINFO : Recreating [token.pickle] file due to authorization issues; {error}")
-                creds = None
-
-        # If there are no (valid) credentials available, let the user log in.
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    "Data/credentials.json", self.scope)
-                creds = flow.run_local_server(port=0)
-            # Save the credentials for the next run
-            with open("Data/token.pickle", "w") as token:
-                token.write(creds.to_json())
+    def _runPhase(self, name: str, function: Callable[..., Any], *args: Any) -> Any:
+        # Runs a start up phase, printing its start and end time relative to the start up
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            end = time.perf_counter()
+            print(f"\tINFO : {name} ran from {start - self.startupTime:.2f} to {end - self.startupTime:.2f} seconds ({end - start:.2f} seconds).")
 
-        slideService = build("slides", "v1", credentials=creds)
-        sheetService = build("sheets", "v4", credentials=creds)
-        driveService = build("drive", "v3", credentials=creds)
+    def getAPIServices(self) -> List[googleapiclient.discovery.Resource]:
+        # Services and credentials are shared with the rest of the application
+        slideService = GoogleSession.getService("slides", "v1")
+        sheetService = GoogleSession.getService("sheets", "v4")
+        driveService = GoogleSession.getService("drive", "v3")
 
         return [slideService, sheetService, driveService]
 
+    def flushRequests(self) -> None:
+        # Hand the requests made so far to the commit pipeline, they are sent in the background
+        optimizedRequests = RequestOptimizer.optimize(self.requests, self.presentationModel)
+        self.requestCount += len(self.requests)
+        self.optimizedRequestCount += len(optimizedRequests)
+
+        self.commitPipeline.submit(optimizedRequests)
+        self.requests = []
+
     def commitSlideChanges(self) -> bool:
         # Commit changes to slides, reset requests, and update data
-        successfulCommit = True
-        if len(self.requests) > 0:
-            try:
-                self.slideService.presentations().batchUpdate(
-                    presentationId=self.newSlideID, body={"requests": self.requests}).execute()
-            except errors.HttpError as error:
-                print(f"\tERROR : An error occurred on committing slide changes; {error}")
-                successfulCommit = False
+        self.flushRequests()
+        successfulCommit, committedRequests, chunkStats = self.commitPipeline.join()
+
+        if self.requestCount > 0:
+            print(f"\tINFO : Request optimizer reduced {self.requestCount} requests to {self.optimizedRequestCount} "
+                  f"(-{100 * (1 - self.optimizedRequestCount / self.requestCount):.1f}%).")
+        self.requestCount = 0
+        self.optimizedRequestCount = 0
+
+        if RequestOptimizer.skippedStyleFieldCount > 0:
+            print(f"\tINFO : Style diffing skipped {RequestOptimizer.skippedStyleRequestCount} style requests and "
+                  f"{RequestOptimizer.skippedStyleFieldCount} style fields already set by the template.")
+        RequestOptimizer.skippedStyleRequestCount = 0
+        RequestOptimizer.skippedStyleFieldCount = 0
+
+        for i, (requestCount, requestBytes, latency) in enumerate(chunkStats):
+            print(f"\tINFO : Commit chunk {i + 1}/{len(chunkStats)} with {requestCount} requests ({requestBytes / 1024:.1f} KB) took {latency:.2f} seconds.")
+
+        if successfulCommit:
+            # Replay the committed requests locally instead of re-downloading the presentation
+            self.presentationModel.applyRequests(committedRequests)
+            if self.verifyPresentationModel:
+                self.verifyPresentation()
+        else:
+            # The presentation state is unknown after a failed commit
+            Logging.writeLog(Logging.LogType.Error, f"GoogleAPITools - Failed to commit slide changes to [{self.newSlideID}]")
+            self.presentationModel = PresentationModel(self.fetchPresentation())
+            self.commitPipeline.revisionID = self.presentationModel.presentation.get("revisionId")
 
-        self.requests = []
-        self.presentation = self.slideService.presentations().get(
-            presentationId=self.newSlideID).execute()
+        self.plannedSlideOrder = self.presentationModel.getSlideIDList()
 
         return successfulCommit
 
+    def fetchPresentation(self) -> dict:
+        # Download the slide data of the presentation; only needed on start up or on demand
+        request = self.slideService.presentations().get(presentationId=self.newSlideID, fields=GoogleAPITools.PresentationFields)
+
+        # Measure the response size and parse time, the response is parsed by the request's postproc
+        fetchStats = {}
+        postproc = request.postproc
+
+        def measuredPostproc(response, content):
+            start = time.perf_counter()
+            result = postproc(response, content)
+            fetchStats["bytes"] = len(content)
+            fetchStats["seconds"] = time.perf_counter() - start
+            return result
+
+        request.postproc = measuredPostproc
+        presentation = RequestExecutor.execute(request, "slides")
+
+        if fetchStats:
+            print(f"\tINFO : Fetched presentation ({fetchStats['bytes'] / 1024:.1f} KB) and parsed it in {1000 * fetchStats['seconds']:.1f} ms.")
+
+        return presentation
+
+    def verifyPresentation(self) -> bool:
+        # Compare the local presentation model against the actual presentation, adopting the latter on mismatch
+        fetchedModel = PresentationModel(self.fetchPresentation())
+
+        matched = fetchedModel.getSlideIDList() == self.presentationModel.getSlideIDList()
+        for i in range(len(fetchedModel.getSlides()) if matched else 0):
+            if self._getSlideTextData(fetchedModel, i) != self._getSlideTextData(self.presentationModel, i):
+                matched = False
+                break
+
+        if not matched:
+            print("\tWARNING : Local presentation model does not match the presentation, using the downloaded presentation instead.")
+            Logging.writeLog(Logging.LogType.Warning, "GoogleAPITools - Local presentation model mismatch")
+            self.presentationModel = fetchedModel
+
+        return matched
+
     # ==========================================================================================
     # =================================== SLIDE DATA GETTERS ===================================
     # ==========================================================================================
 
     def getTotalSlideNumber(self) -> int:
         # Returns the total number of slides
-        return len(self.presentation.get("slides"))
+        return len(self.presentationModel.getSlides())
 
     def getText(self, pageElement: dict) -> str:
         # Returns the first block of formatted text from an element
@@ -141,29 +277,77 @@ class GoogleAPITools:
         except:
             return ""
 
+    def getSlideIndex(self) -> dict:
+        # Index of the current presentation model, see buildSlideIndex()
+        if self.slideIndexRevision != self.presentationModel.revision:
+            self.slideIndex = self.buildSlideIndex(self.presentationModel)
+            self.slideIndexRevision = self.presentationModel.revision
+        return self.slideIndex
+
     def getSlideTextData(self, slideIndex: int) -> List[List[str]]:
-        # Returns the objectID and text from the textboxes in the indexed slide
+        # Returns the objectID and text from the textboxes in the indexed slide; the list is shared and must not be modified
+        return self.getSlideIndex()["slides"][slideIndex]["textData"]
+
+    def _getSlideTextData(self, presentationModel: PresentationModel, slideIndex: int) -> List[List[str]]:
         textObjects = []
-        for element in self.presentation.get("slides")[slideIndex]["pageElements"]:
+        for element in presentationModel.getSlides()[slideIndex].get("pageElements", []):
             textObject = [element.get("objectId"), self.getText(element)]
             if textObject[1] != "":
                 textObjects.append(textObject)
         return textObjects
 
     def getSlideID(self, slideIndex: int) -> str:
-        return self.presentation.get("slides")[slideIndex]["objectId"]
+        return self.getSlideIndex()["slides"][slideIndex]["slideID"]
 
     def getPresentationLength(self) -> int:
-        return len(self.presentation.get("slides"))
+        return len(self.presentationModel.getSlides())
 
     def getTableID(self, slideIndex: int) -> List[str]:
+        return list(self.getSlideIndex()["slides"][slideIndex]["tableIDs"])
+
+    def getPlaceholderMap(self, slideIndex: int) -> Dict[str, List[str]]:
+        # Returns the placeholders (i.e., "{Title}") of the indexed slide, mapped to the objectIDs holding them
+        return self.getSlideIndex()["slides"][slideIndex]["placeholders"]
+
+    def _getTableID(self, presentationModel: PresentationModel, slideIndex: int) -> List[str]:
         tableIDList = []
-        for elem in self.presentation.get("slides")[slideIndex]["pageElements"]:
+        for elem in presentationModel.getSlides()[slideIndex].get("pageElements", []):
             if "table" in elem:
                 tableIDList.append(elem["objectId"])
 
         return tableIDList
 
+    def buildSlideIndex(self, presentationModel: PresentationModel) -> dict:
+        # Scans every slide once. Per slide index: slide ID, text box data, table IDs, and placeholders mapped to
+        # the objectIDs holding them (one entry per text box or table cell). Also maps each objectID to its slide index,
+        # and each text box to its full text. Only lists, dicts and strings are used so the index can be saved as JSON
+        slideIndex: dict = {"slides": [], "objects": {}, "texts": {}}
+
+        for i, slide in enumerate(presentationModel.getSlides()):
+            placeholderMap: Dict[str, List[str]] = {}
+            for element in slide.get("pageElements", []):
+                objectID = element.get("objectId")
+                slideIndex["objects"][objectID] = i
+
+                textDictList = [element["shape"]["text"]] if "text" in element.get("shape", {}) else []
+                for row in element.get("table", {}).get("tableRows", []):
+                    textDictList += [cell["text"] for cell in row.get("tableCells", []) if "text" in cell]
+
+                for textDict in textDictList:
+                    text = PresentationModel.getFullText(textDict)
+                    for placeholder in set(re.findall(r"\{\w+\}", text)):
+                        placeholderMap.setdefault(placeholder, []).append(objectID)
+
+                if "shape" in element:
+                    slideIndex["texts"][objectID] = PresentationModel.getFullText(element["shape"].get("text"))
+
+            slideIndex["slides"].append({"slideID": slide["objectId"],
+                                         "textData": self._getSlideTextData(presentationModel, i),
+                                         "tableIDs": self._getTableID(presentationModel, i),
+                                         "placeholders": placeholderMap})
+
+        return slideIndex
+
     # ==========================================================================================
     # =================================== SLIDE MODIFIERS ======================================
     # ==========================================================================================
@@ -182,27 +366,135 @@ class GoogleAPITools:
         self.requests.append({"duplicateObject": {"objectId": sourceSlideID,
                                                   "objectIds": newSlideObjectIDMapping}})
 
+        for objID, newObjID in newSlideObjectIDMapping.items():
+            self.duplicateSourceMap[newObjID] = (objID, newSlideObjectIDMapping[sourceSlideID])
+
+        self.plannedSlideOrder.insert(self.plannedSlideOrder.index(sourceSlideID) + 1, newSlideObjectIDMapping[sourceSlideID])
+
         return newSlideObjectIDMapping
 
     def deleteSlide(self, slideObjectID: str) -> None:
         # Delete the slide with the "slideObjectID"
         self.requests.append({"deleteObject": {"objectId": slideObjectID}})
 
+        if slideObjectID in self.plannedSlideOrder:
+            self.plannedSlideOrder.remove(slideObjectID)
+
     def moveSlideSet(self, slideObjectIDList: list[str], newLocationIndex: int) -> None:
         # Move set of slides to new location while maintaining relative ordering.
         # SlideID must be in presentation order with no duplicates.
         self.requests.append({"updateSlidesPosition": {"slideObjectIds": slideObjectIDList,
                                                        "insertionIndex": newLocationIndex}})
 
+        self.plannedSlideOrder = PresentationModel.getMovedSlideOrder(self.plannedSlideOrder, slideObjectIDList, newLocationIndex)
+
+    def arrangeSlides(self, slideObjectIDList: List[str]) -> int:
+        # Delete every slide that is not listed and put the listed slides in the given order, with as few requests as possible.
+        # Returns the number of requests made.
+        requestCount = 0
+
+        # A deleteObject request only takes a single object
+        slideObjectIDSet = set(slideObjectIDList)
+        for slideObjectID in [slideID for slideID in self.plannedSlideOrder if slideID not in slideObjectIDSet]:
+            self.deleteSlide(slideObjectID)
+            requestCount += 1
+
+        # Slides already in the right relative order stay in place, every other slide is moved right after its predecessor.
+        # Consecutive slides to be moved are moved together if they are already in the right relative order.
+        positionList = [self.plannedSlideOrder.index(slideID) for slideID in slideObjectIDList]
+        stayingIndexSet = self._getLongestIncreasingSubsequence(positionList)
+
+        i = 0
+        while i < len(slideObjectIDList):
+            if i in stayingIndexSet:
+                i += 1
+                continue
+
+            j = i + 1
+            while j < len(slideObjectIDList) and j not in stayingIndexSet and positionList[j] > positionList[j - 1]:
+                j += 1
+
+            insertionIndex = 0 if i == 0 else self.plannedSlideOrder.index(slideObjectIDList[i - 1]) + 1
+            self.moveSlideSet(slideObjectIDList[i:j], insertionIndex)
+            requestCount += 1
+
+            # Moving slides changes the positions of the remaining ones, though not their relative order
+            positionList = [self.plannedSlideOrder.index(slideID) for slideID in slideObjectIDList]
+            i = j
+
+        return requestCount
+
+    def _getLongestIncreasingSubsequence(self, valueList: List[int]) -> set:
+        # Returns the indexes of a longest strictly increasing subsequence (patience sorting)
+        tailIndexList: List[int] = []
+        previousIndexList = [-1] * len(valueList)
+
+        for i, value in enumerate(valueList):
+            low, high = 0, len(tailIndexList)
+            while low < high:
+                middle = (low + high) // 2
+                if valueList[tailIndexList[middle]] < value:
+                    low = middle + 1
+                else:
+                    high = middle
+
+            previousIndexList[i] = tailIndexList[low - 1] if low > 0 else -1
+            if low == len(tailIndexList):
+                tailIndexList.append(i)
+            else:
+                tailIndexList[low] = i
+
+        indexSet = set()
+        index = tailIndexList[-1] if tailIndexList else -1
+        while index >= 0:
+            indexSet.add(index)
+            index = previousIndexList[index]
+
+        return indexSet
+
     # ==========================================================================================
     # ================================= SLIDE FORMAT SETTERS ===================================
     # ==========================================================================================
 
     def setText(self, objectID: str, newText: str) -> None:
+        # Fill the placeholder of a duplicated text box in place if possible
+        placeholder = self._getReplaceablePlaceholder(objectID)
+        if placeholder:
+            self.replaceAllText(placeholder, newText, [self.duplicateSourceMap[objectID][1]])
+            return
+
         # Delete existing text and insert new
         self.requests.append({"deleteText": {"objectId": objectID}})
         self.requests.append({"insertText": {"objectId": objectID, "text": newText}})
 
+    def replaceAllText(self, placeholder: str, newText: str, slideObjectIDList: List[str]) -> None:
+        # Replace every (case sensitive) occurrence of the placeholder within the listed slides
+        self.requests.append({"replaceAllText": {"containsText": {"text": placeholder, "matchCase": True},
+                                                 "replaceText": newText,
+                                                 "pageObjectIds": slideObjectIDList}})
+
+    def _getReplaceablePlaceholder(self, objectID: str) -> str:
+        # Returns the placeholder held by a duplicated text box if "replaceAllText" can fill it, otherwise an empty string.
+        # The text box must hold nothing but the placeholder, and be the only one on its slide holding it.
+        if self.placeholderFillMode != "ReplaceAllText" or objectID not in self.duplicateSourceMap or objectID in self.filledObjectIDs:
+            return ""
+
+        slideIndex = self.getSlideIndex()
+        sourceObjectID = self.duplicateSourceMap[objectID][0]
+        if sourceObjectID not in slideIndex["texts"]:
+            return ""
+
+        placeholder = slideIndex["texts"][sourceObjectID].rstrip("\n")
+        if not re.fullmatch(r"\{\w+\}", placeholder):
+            return ""
+
+        holderCount = len(slideIndex["slides"][slideIndex["objects"][sourceObjectID]]["placeholders"].get(placeholder, []))
+        if holderCount != 1:
+            return ""
+
+        self.filledObjectIDs.add(objectID)
+        return placeholder
+
     def setTextInTable(self, tableID: str, newText: str, rowIndex: int, colIndex: int) -> None:
         # For a specific table cell, delete existing text and insert new
         self.requests.append({"deleteText": {"objectId": tableID,
@@ -317,7 +609,7 @@ class GoogleAPITools:
         dataRange = self.globalConfig["SLIDE_MAKER_SHEET"]["SlideMakerSheetAnnouncementsRange"]
 
         try:
-            response = self.sheetService.spreadsheets().values().get(spreadsheetId=sheetID, range=dataRange).execute()
+            response = RequestExecutor.execute(self.sheetService.spreadsheets().values().get(spreadsheetId=sheetID, range=dataRange), "sheets")
 
             # Flatten the nested list, remove new line and extra spaces
             return [" ".join(val.split()) for sublist in response["values"] for val in sublist]
@@ -332,7 +624,7 @@ class GoogleAPITools:
         dataRange = self.globalConfig["SLIDE_MAKER_SHEET"]["SlideMakerSheetSupplicationsRange"]
 
         try:
-            response = self.sheetService.spreadsheets().values().get(spreadsheetId=sheetID, range=dataRange).execute()
+            response = RequestExecutor.execute(self.sheetService.spreadsheets().values().get(spreadsheetId=sheetID, range=dataRange), "sheets")
 
             # Flatten the nested list, remove new line and extra spaces
             return [" ".join(val.split()) for sublist in response["values"] for val in sublist]
@@ -390,73 +682,435 @@ class GoogleAPITools:
 
     def removePreviousSlides(self) -> None:
         # Delete all previously created slide files on drive
-        if os.path.exists("Data/SlideIDList.txt"):
-            with open("Data/SlideIDList.txt", "r+") as f:
-                lines = f.readlines()
+        self.removeSlideFiles(self.takePreviousSlideIDList())
+
+    def takePreviousSlideIDList(self) -> List[str]:
+        # Returns the IDs of the previously created slide files, and clears out the list
+        if not os.path.exists("Data/SlideIDList.txt"):
+            return []
+
+        with open("Data/SlideIDList.txt", "r+") as f:
+            # Get rid of the new line symbol in the ID
+            slideIDList = [line.rstrip("\n") for line in f.readlines() if line.strip()]
 
-                for line in lines:
-                    try:
-                        # Get rid of the new line symbol in the ID
-                        self.driveService.files().delete(fileId=line[:-1]).execute()
-                    except errors.HttpError as error:
-                        print(f"ERROR : An error occurred on slide removal; {error}")
+            # Clear out the file
+            f.truncate(0)
 
-                # Clear out the file
-                f.truncate(0)
+        return slideIDList
+
+    def removeSlideFiles(self, slideIDList: List[str]) -> None:
+        for slideID in slideIDList:
+            try:
+                RequestExecutor.execute(self.driveService.files().delete(fileId=slideID), "drive", write=True)
+            except errors.HttpError as error:
+                print(f"ERROR : An error occurred on slide removal; {error}")
 
     def getDuplicatePresentation(self, type: str) -> str:
-        # Generates a duplicate presentation from source slide
+        # Generates a duplicate presentation from source slide, or claims a spare copy of it
         body = {
             "name": self.getUpcomingSlideTitle(type)
         }
 
-        drive_response = {}
-        try:
-            drive_response = self.driveService.files().copy(
-                fileId=self.sourceSlideID, body=body).execute()
-        except errors.HttpError as error:
-            print(f"ERROR : An error occurred on slide duplication; {error}")
+        newID = self.claimSpareCopy(type, body["name"]) if self.copyPoolEnabled else ""
+        if not newID:
+            drive_response = {}
+            try:
+                drive_response = RequestExecutor.execute(self.driveService.files().copy(
+                    fileId=self.sourceSlideID, body=body), "drive", write=True, idempotent=False)
+            except errors.HttpError as error:
+                print(f"ERROR : An error occurred on slide duplication; {error}")
+            newID = str(drive_response.get("id"))
 
         # Write ID to file, so it can be deleted later
-        newID = str(drive_response.get("id"))
         with open("Data/SlideIDList.txt", "a") as f:
             f.write(newID + "\n")
 
         return newID
 
+    # ==========================================================================================
+    # ======================================= COPY POOL ========================================
+    # ==========================================================================================
+
+    # Spare copies per type, as {type: {"id", "sourceSlideID", "sourceRevisionID"}}; kept apart from SlideIDList.txt
+    # so removePreviousSlides() leaves them alone
+    CopyPoolPath = "Data/CopyPool.json"
+    copyPoolLock = threading.Lock()
+
+    def claimSpareCopy(self, type: str, name: str) -> str:
+        # Takes the spare copy of the type out of the pool and renames it; returns an empty string if there is no usable spare
+        with GoogleAPITools.copyPoolLock:
+            copyPool = self._readCopyPool()
+            spare = copyPool.pop(type, None)
+            self._writeCopyPool(copyPool)
+
+        if spare is None:
+            return ""
+
+        if spare.get("sourceSlideID") != self.sourceSlideID or self.sourceRevisionID is None or spare.get("sourceRevisionID") != self.sourceRevisionID:
+            # Made from an older version of the source presentation
+            self._deleteSpareCopy(spare["id"])
+            return ""
+
+        try:
+            RequestExecutor.execute(self.driveService.files().update(
+                fileId=spare["id"], body={"name": name}, fields="id"), "drive", write=True)
+        except errors.HttpError as error:
+            # The spare is already out of the pool, it would otherwise be left behind on Drive
+            print(f"\tWARNING : Spare copy could not be claimed, copying the source presentation instead; {error}")
+            self._deleteSpareCopy(spare["id"])
+            return ""
+
+        print(f"\tINFO : Claimed spare copy [{spare['id']}].")
+        return spare["id"]
+
+    def refillCopyPool(self) -> None:
+        # Make a spare copy for the next run of the same type on a background thread; the thread is not a daemon,
+        # so the copy completes even if the application is closed right away
+        if not self.copyPoolEnabled or self.sourceRevisionID is None:
+            return
+
+        threading.Thread(target=self._makeSpareCopy, args=(self.type, self.sourceRevisionID)).start()
+
+    def _makeSpareCopy(self, type: str, sourceRevisionID: str) -> None:
+        with GoogleAPITools.copyPoolLock:
+            spare = self._readCopyPool().get(type)
+
+        if spare is not None:
+            if spare.get("sourceSlideID") == self.sourceSlideID and spare.get("sourceRevisionID") == sourceRevisionID:
+                return
+            self._deleteSpareCopy(spare["id"])
+
+        try:
+            response = RequestExecutor.execute(self.driveService.files().copy(
+                fileId=self.sourceSlideID, body={"name": f"Spare Slides - {type}"}, fields="id"), "drive", write=True, idempotent=False)
+        except Exception as error:
+            print(f"\tWARNING : Spare copy could not be made; {error}")
+            return
+
+        with GoogleAPITools.copyPoolLock:
+            copyPool = self._readCopyPool()
+            replacedSpare = copyPool.get(type)
+            copyPool[type] = {"id": response["id"], "sourceSlideID": self.sourceSlideID, "sourceRevisionID": sourceRevisionID}
+            self._writeCopyPool(copyPool)
+
+        if replacedSpare is not None and replacedSpare["id"] != response["id"]:
+            self._deleteSpareCopy(replacedSpare["id"])
+
+    def _deleteSpareCopy(self, fileID: str) -> None:
+        try:
+            RequestExecutor.execute(self.driveService.files().delete(fileId=fileID), "drive", write=True)
+        except Exception as error:
+            print(f"\tWARNING : Spare copy [{fileID}] could not be deleted; {error}")
+
+    @staticmethod
+    def _readCopyPool() -> Dict[str, dict]:
+        if not os.path.exists(GoogleAPITools.CopyPoolPath):
+            return {}
+        try:
+            with open(GoogleAPITools.CopyPoolPath, "r", encoding="utf8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _writeCopyPool(copyPool: Dict[str, dict]) -> None:
+        with open(GoogleAPITools.CopyPoolPath, "w", encoding="utf8") as f:
+            json.dump(copyPool, f, indent=4)
+
     # ==========================================================================================
     # =================================== LOCAL CHANGE TOOLS ===================================
     # ==========================================================================================
 
+    def getSourceRevisionID(self) -> Optional[str]:
+        # Revision of the source presentation, changes on every edit of the template
+        try:
+            return RequestExecutor.execute(self.slideService.presentations().get(
+                presentationId=self.sourceSlideID, fields="revisionId"), "slides").get("revisionId")
+        except errors.HttpError as error:
+            print(f"\tWARNING : Source presentation revision could not be retrieved; {error}")
+            return None
+
+    def loadTemplateManifest(self, sourceRevisionID: Optional[str]) -> Optional[dict]:
+        # Returns the manifest of the source presentation if it is still up to date
+        if sourceRevisionID is None or not os.path.exists(self.templateManifestPath):
+            return None
+
+        try:
+            with open(self.templateManifestPath, "r", encoding="utf8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as error:
+            print(f"\tWARNING : Template manifest could not be read; {error}")
+            return None
+
+        if (manifest.get("sourceSlideID") != self.sourceSlideID or manifest.get("sourceRevisionID") != sourceRevisionID
+                or manifest.get("fields") != GoogleAPITools.PresentationFields or "slideIndex" not in manifest):
+            return None
+
+        print(f"\tINFO : Template is unchanged since revision [{sourceRevisionID}], using the template manifest.")
+        return manifest
+
+    def saveTemplateManifest(self, sourceRevisionID: Optional[str]) -> None:
+        # Store the slide data and slide index of the freshly copied (and untouched) presentation for the following runs
+        if sourceRevisionID is None:
+            return
+
+        # Slide data of the copy, with the revision of the copy itself left out
+        presentation = {key: value for key, value in self.presentationModel.presentation.items() if key != "revisionId"}
+        manifest = {
+            "sourceSlideID": self.sourceSlideID,
+            "sourceRevisionID": sourceRevisionID,
+            "fields": GoogleAPITools.PresentationFields,
+            "presentation": presentation,
+            "slideIndex": self.slideIndex
+        }
+
+        try:
+            with open(self.templateManifestPath, "w", encoding="utf8") as f:
+                json.dump(manifest, f)
+        except OSError as error:
+            print(f"\tWARNING : Template manifest could not be saved; {error}")
+
     def updateData(self) -> None:
-        # Lookup latest HymnDatabase file and property files on Google Drive, replace local copy if local copy is older
-        dataTypeList = ["HymnDatabase", "ProjectedSlideProperties", "RegularSlideProperties", "StreamSlideProperties"]
-        fileNameList = ["HymnDatabase.db", "ProjectedSlideProperties.ini", "RegularSlideProperties.ini", "StreamSlideProperties.ini"]
-        for i, dataType in enumerate(dataTypeList):
-            try:
-                fileID = self.globalConfig["GOOGLE_DRIVE_DATA"][dataType + "FileID"]
-                filedDetails = self.driveService.files().get(fileId=fileID,
-                                                             fields="modifiedTime").execute()
-
-                # Get modified date of DataBase.db file and compare
-                localModifiedDate = pytz.utc.localize(datetime.datetime.min)
-                driveModifiedDate = pytz.utc.localize(datetime.datetime.strptime(filedDetails["modifiedTime"], "%Y-%m-%dT%H:%M:%S.%fZ"))
-
-                if os.path.exists("Data/" + fileNameList[i]):
-                    localModifiedDate = datetime.datetime.fromtimestamp(os.path.getmtime("Data/" + fileNameList[i]), datetime.timezone.utc)
-
-                # Overwrite local file
-                if localModifiedDate < driveModifiedDate:
-                    Logging.writeLog(Logging.LogType.Info, f"GoogleAPITools - Updating {dataType} from [{localModifiedDate}] to [{driveModifiedDate}]")
-                    request = self.driveService.files().get_media(fileId=fileID)
-                    with open("Data/" + fileNameList[i], "wb") as f:
-                        downloader = MediaIoBaseDownload(f, request)
-                        done = False
-                        while done is False:
-                            status, done = downloader.next_chunk()
-                            print(f"UPDATING {dataType.upper()} : %d%%" % int(status.progress() * 100))
-            except errors.HttpError as error:
+        # Lookup latest HymnDatabase file and property files on Google Drive, replace local copy if it differs
+        dataFileMetadata = self.getDataFileMetadata()
+        updated = [self.updateDataFile(dataType, fileName, dataFileMetadata.get(dataType))
+                   for dataType, fileName in zip(GoogleAPITools.DataTypeList, GoogleAPITools.DataFileNameList)]
+        self.saveDataChangeToken(all(updated))
+        HymnDatabase.setSynced()
+
+    def getDataFileMetadata(self) -> Dict[str, dict]:
+        # Drive metadata of the data files that may have changed since the last run; see saveDataChangeToken()
+        self.dataChangeToken: Optional[str] = None
+        if not self.globalConfig.getboolean("GOOGLE_API_SETTINGS", "DriveChangesFeedEnabled", fallback=True):
+            return self._getAllDataFileMetadata()
+
+        # Without a cursor, or with missing local files, every data file is looked up
+        if os.path.exists(GoogleAPITools.DataChangeTokenPath) and all(os.path.exists("Data/" + fileName) for fileName in GoogleAPITools.DataFileNameList):
+            with open(GoogleAPITools.DataChangeTokenPath, "r") as f:
+                changedDataFileMetadata = self._getChangedDataFileMetadata(f.read().strip())
+            if changedDataFileMetadata is not None:
+                return changedDataFileMetadata
+
+        # The cursor is taken before the lookup, so changes made in between are seen next run
+        try:
+            self.dataChangeToken = RequestExecutor.execute(self.driveService.changes().getStartPageToken(), "drive").get("startPageToken")
+        except errors.HttpError as error:
+            print(f"\tWARNING : Google Drive changes cursor could not be retrieved; {error}")
+
+        return self._getAllDataFileMetadata()
+
+    def _getChangedDataFileMetadata(self, pageToken: str) -> Optional[Dict[str, dict]]:
+        # Lists the Drive changes since the cursor, usually a single page; returns None if the cursor is no longer valid
+        dataTypeMap = {self.globalConfig["GOOGLE_DRIVE_DATA"][dataType + "FileID"]: dataType for dataType in GoogleAPITools.DataTypeList}
+        dataFileMetadata: Dict[str, dict] = {}
+
+        try:
+            while pageToken:
+                response = RequestExecutor.execute(self.driveService.changes().list(
+                    pageToken=pageToken, pageSize=1000, spaces="drive",
+                    fields="nextPageToken,newStartPageToken,changes(fileId,removed,file(id,md5Checksum,size,modifiedTime,trashed))"), "drive")
+
+                for change in response.get("changes", []):
+                    dataType = dataTypeMap.get(change.get("fileId"))
+                    if dataType is None:
+                        continue
+                    if change.get("removed") or change.get("file", {}).get("trashed"):
+                        print(f"\tWARNING : {dataType} was removed from Google Drive, keeping the local file.")
+                        dataFileMetadata.pop(dataType, None)
+                    else:
+                        dataFileMetadata[dataType] = change["file"]
+
+                pageToken = response.get("nextPageToken")
+                self.dataChangeToken = response.get("newStartPageToken", self.dataChangeToken)
+        except errors.HttpError as error:
+            print(f"\tWARNING : Google Drive changes could not be listed, looking up every data file; {error}")
+            self.dataChangeToken = None
+            return None
+
+        print(f"\tINFO : {len(dataFileMetadata)} data file(s) changed on Google Drive since the last run.")
+        return dataFileMetadata
+
+    def saveDataChangeToken(self, updated: bool) -> None:
+        # Move the cursor forward only once every changed data file is updated, otherwise look them all up next run
+        if updated and self.dataChangeToken:
+            with open(GoogleAPITools.DataChangeTokenPath, "w") as f:
+                f.write(self.dataChangeToken)
+        elif os.path.exists(GoogleAPITools.DataChangeTokenPath):
+            os.remove(GoogleAPITools.DataChangeTokenPath)
+
+    def _getAllDataFileMetadata(self) -> Dict[str, dict]:
+        # Drive metadata of every data file in one batch request; files whose metadata could not be retrieved are left out
+        dataFileMetadata: Dict[str, dict] = {}
+
+        def callback(dataType: str, response: dict, error: Exception) -> None:
+            if error is not None:
                 print(f"ERROR : An error occurred on updating {dataType.upper()}; {error}")
+            else:
+                dataFileMetadata[dataType] = response
+
+        batch = self.driveService.new_batch_http_request(callback=callback)
+        for dataType in GoogleAPITools.DataTypeList:
+            fileID = self.globalConfig["GOOGLE_DRIVE_DATA"][dataType + "FileID"]
+            batch.add(self.driveService.files().get(fileId=fileID, fields="id,md5Checksum,size,modifiedTime"), request_id=dataType)
+
+        try:
+            RequestExecutor.call(lambda: batch.execute(http=GoogleSession.getHttp()), "drive")
+        except errors.HttpError as error:
+            print(f"ERROR : An error occurred on looking up data files; {error}")
+
+        return dataFileMetadata
+
+    def updateDataFile(self, dataType: str, fileName: str, metadata: Optional[dict]) -> bool:
+        # Safe to run on any thread, requests and downloads run on the thread's own connection.
+        # Returns False if the file could not be updated; files without metadata are left as they are
+        if metadata is None:
+            return True
+
+        if "md5Checksum" in metadata:
+            if self.getLocalChecksum(fileName) == metadata["md5Checksum"]:
+                return True
+        else:
+            # Files without content checksum (i.e., Google Docs formats) fall back to comparing modified dates
+            localModifiedDate = pytz.utc.localize(datetime.datetime.min)
+            driveModifiedDate = pytz.utc.localize(datetime.datetime.strptime(metadata["modifiedTime"], "%Y-%m-%dT%H:%M:%S.%fZ"))
+            if os.path.exists("Data/" + fileName):
+                localModifiedDate = datetime.datetime.fromtimestamp(os.path.getmtime("Data/" + fileName), datetime.timezone.utc)
+            if localModifiedDate >= driveModifiedDate:
+                return True
+
+        try:
+            if dataType == "HymnDatabase" and "md5Checksum" in metadata and self.applyHymnDatabaseChangeset(fileName, metadata):
+                return True
+            return self.downloadDataFile(dataType, fileName, metadata)
+        except errors.HttpError as error:
+            print(f"ERROR : An error occurred on updating {dataType.upper()}; {error}")
+            return False
+
+    def applyHymnDatabaseChangeset(self, fileName: str, metadata: dict) -> bool:
+        # Bring the local database up to date with the published changeset (see HymnDatabaseDelta); returns False
+        # if the changeset does not belong to the Drive database or does not apply to the local one
+        changesetFileID = self.globalConfig.get("GOOGLE_DRIVE_DATA", "HymnDatabaseChangesetFileID", fallback="")
+        if not changesetFileID or not os.path.exists("Data/" + fileName):
+            return False
+
+        start = time.perf_counter()
+        tempPath = "Data/" + fileName + ".delta"
+        try:
+            content = RequestExecutor.execute(self.driveService.files().get_media(fileId=changesetFileID), "drive")
+            (header, operations) = HymnDatabaseDelta.parseChangeset(content.decode("utf8"))
+            if header.get("databaseMd5") != metadata["md5Checksum"]:
+                print("\tINFO : Hymn database changeset is not up to date, downloading the whole database.")
+                return False
+
+            # Applied to a copy, which replaces the local database only once it matches the published content
+            shutil.copyfile("Data/" + fileName, tempPath)
+            con = sqlite3.connect(tempPath)
+            try:
+                applied = HymnDatabaseDelta.applyChangeset(con, header, operations)
+            finally:
+                con.close()
+
+            if not applied:
+                print("\tINFO : Local hymn database is not at the changeset's base version, downloading the whole database.")
+                return False
+
+            HymnDatabase.close()
+            os.replace(tempPath, "Data/" + fileName)
+        except (errors.HttpError, OSError, ValueError, KeyError, sqlite3.Error) as error:
+            print(f"\tWARNING : Hymn database changeset could not be applied, downloading the whole database; {error}")
+            return False
+        finally:
+            if os.path.exists(tempPath):
+                os.remove(tempPath)
+
+        self._saveLocalChecksum(fileName, metadata["md5Checksum"])
+
+        elapsed = time.perf_counter() - start
+        print(f"\tINFO : Applied {len(operations)} hymn database row changes in {elapsed:.2f} seconds.")
+        Logging.writeLog(Logging.LogType.Info, f"GoogleAPITools - Updated HymnDatabase to [{metadata['modifiedTime']}] "
+                                               f"with {len(operations)} row changes ({len(content)} bytes in {elapsed:.2f} seconds)")
+        return True
+
+    def downloadDataFile(self, dataType: str, fileName: str, metadata: dict) -> bool:
+        # Download into a temporary file that replaces the local file once verified, so an interrupted
+        # download never leaves a corrupt file behind
+        chunkSize = self.globalConfig.getint("GOOGLE_API_SETTINGS", "DriveDownloadChunkBytes", fallback=100 * 1024 * 1024)
+        tempPath = "Data/" + fileName + ".download"
+        start = time.perf_counter()
+
+        request = self.driveService.files().get_media(fileId=metadata["id"])
+        request.http = GoogleSession.getHttp()
+        try:
+            with open(tempPath, "wb") as f:
+                downloader = MediaIoBaseDownload(f, request, chunksize=chunkSize)
+                done = False
+                while done is False:
+                    status, done = RequestExecutor.call(downloader.next_chunk, "drive")
+                    print(f"UPDATING {dataType.upper()} : %d%%" % int(status.progress() * 100))
+
+            checksum = self._getFileChecksum(tempPath)
+            if "md5Checksum" in metadata and checksum != metadata["md5Checksum"]:
+                print(f"ERROR : Downloaded {dataType.upper()} does not match its checksum, keeping the local file.")
+                Logging.writeLog(Logging.LogType.Error, f"GoogleAPITools - Checksum mismatch on downloading {dataType}")
+                return False
+
+            # The shared hymn database connection would keep reading the replaced file
+            if "Data/" + fileName == HymnDatabase.DatabasePath:
+                HymnDatabase.close()
+            os.replace(tempPath, "Data/" + fileName)
+        finally:
+            if os.path.exists(tempPath):
+                os.remove(tempPath)
+
+        self._saveLocalChecksum(fileName, checksum)
+
+        size = os.path.getsize("Data/" + fileName)
+        elapsed = time.perf_counter() - start
+        print(f"\tINFO : Downloaded {dataType} ({size / 1024:.1f} KB) in {elapsed:.2f} seconds.")
+        Logging.writeLog(Logging.LogType.Info, f"GoogleAPITools - Updated {dataType} to [{metadata['modifiedTime']}] ({size} bytes in {elapsed:.2f} seconds)")
+        return True
+
+    def getLocalChecksum(self, fileName: str) -> Optional[str]:
+        # MD5 checksum of a local data file, only recomputed when the file changed since it was stored
+        path = "Data/" + fileName
+        if not os.path.exists(path):
+            return None
+
+        stat = os.stat(path)
+        with GoogleAPITools.dataChecksumLock:
+            entry = self._readDataChecksums().get(fileName, {})
+        if entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime_ns:
+            return entry.get("md5")
+
+        checksum = self._getFileChecksum(path)
+        self._saveLocalChecksum(fileName, checksum)
+        return checksum
+
+    def _saveLocalChecksum(self, fileName: str, checksum: str) -> None:
+        stat = os.stat("Data/" + fileName)
+        with GoogleAPITools.dataChecksumLock:
+            dataChecksums = self._readDataChecksums()
+            dataChecksums[fileName] = {"md5": checksum, "size": stat.st_size, "mtime": stat.st_mtime_ns}
+            with open(GoogleAPITools.DataChecksumPath, "w", encoding="utf8") as f:
+                json.dump(dataChecksums, f, indent=4)
+
+    @staticmethod
+    def _readDataChecksums() -> Dict[str, dict]:
+        if not os.path.exists(GoogleAPITools.DataChecksumPath):
+            return {}
+        try:
+            with open(GoogleAPITools.DataChecksumPath, "r", encoding="utf8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _getFileChecksum(path: str) -> str:
+        md5 = hashlib.md5()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                md5.update(block)
+        return md5.hexdigest()
 
 # ==============================================================================================
 # ============================================ TESTER ==========================================
@@ -0,0 +1,173 @@
+import configparser
+import datetime
+import json
+import os
+import threading
+
+from typing import Dict, Optional
+
+import googleapiclient
+import google_auth_httplib2
+import httplib2
+
+from googleapiclient.discovery import build_from_document, V2_DISCOVERY_URI
+from googleapiclient.discovery_cache import get_static_doc
+from google_auth_oauthlib.flow import InstalledAppFlow
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+
+"""
+
+Process wide Google credentials and API services, shared by GoogleAPITools and Logging.
+
+ - Credentials are loaded once and refreshed ahead of expiry on a background thread
+ - Services are built once from discovery documents cached in Data/Discovery, so building needs no network
+ - Each thread has one authorized HTTP connection pool shared by all services (httplib2 is not thread safe);
+   RequestExecutor runs every request on the calling thread's pool
+
+"""
+
+
+class GoogleSession:
+    # If modifying these scopes, delete the file token.pickle.
+    Scopes = ["https://www.googleapis.com/auth/presentations",
+              "https://www.googleapis.com/auth/spreadsheets",
+              "https://www.googleapis.com/auth/drive"]
+
+    DiscoveryCachePath = "Data/Discovery"
+
+    globalConfig = configparser.ConfigParser()
+    globalConfig.read("Data/GlobalProperties.ini")
+
+    timeoutSeconds = globalConfig.getfloat("GOOGLE_API_SETTINGS", "ApiTimeoutSeconds", fallback=60.0)
+    refreshMarginSeconds = globalConfig.getfloat("GOOGLE_API_SETTINGS", "TokenRefreshMarginSeconds", fallback=300.0)
+
+    credentials: Optional[Credentials] = None
+    services: Dict[str, googleapiclient.discovery.Resource] = {}
+    lock = threading.RLock()
+    threadData = threading.local()
+    refreshTimer: Optional[threading.Timer] = None
+
+    # ==========================================================================================
+    # ========================================= GETTERS ========================================
+    # ==========================================================================================
+
+    @staticmethod
+    def getCredentials() -> Credentials:
+        with GoogleSession.lock:
+            if GoogleSession.credentials is None:
+                GoogleSession.credentials = GoogleSession._loadCredentials()
+                GoogleSession._scheduleRefresh()
+
+            return GoogleSession.credentials
+
+    @staticmethod
+    def getService(name: str, version: str) -> googleapiclient.discovery.Resource:
+        # Returns the shared service, i.e., getService("slides", "v1")
+        with GoogleSession.lock:
+            key = f"{name}.{version}"
+            if key not in GoogleSession.services:
+                GoogleSession.services[key] = build_from_document(GoogleSession._getDiscoveryDocument(name, version),
+                                                                  http=GoogleSession.getHttp())
+            return GoogleSession.services[key]
+
+    @staticmethod
+    def getHttp() -> google_auth_httplib2.AuthorizedHttp:
+        # The calling thread's authorized HTTP connection pool
+        http = getattr(GoogleSession.threadData, "http", None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(GoogleSession.getCredentials(), http=httplib2.Http(timeout=GoogleSession.timeoutSeconds))
+            GoogleSession.threadData.http = http
+        return http
+
+    # ==========================================================================================
+    # ======================================= CREDENTIALS ======================================
+    # ==========================================================================================
+
+    @staticmethod
+    def _loadCredentials() -> Credentials:
+        # Refer to https://developers.google.com/slides/api/quickstart/python
+        creds = None
+        # The file token.pickle stores the user's access and refresh tokens, and is
+        # created automatically when the authorization flow completes for the first
+        # time.
+        if os.path.exists("Data/token.pickle"):
+            try:
+                creds = Credentials.from_authorized_user_file("Data/token.pickle", GoogleSession.Scopes)
+            except Exception as error:
+                print(f"\tINFO : Recreating [token.pickle] file due to authorization issues; {error}")
+                creds = None
+
+        # If there are no (valid) credentials available, let the user log in.
+        if not creds or not creds.valid:
+            if creds and creds.expired and creds.refresh_token:
+                creds.refresh(Request())
+            else:
+                flow = InstalledAppFlow.from_client_secrets_file(
+                    "Data/credentials.json", GoogleSession.Scopes)
+                creds = flow.run_local_server(port=0)
+            GoogleSession._saveCredentials(creds)
+
+        return creds
+
+    @staticmethod
+    def _saveCredentials(creds: Credentials) -> None:
+        # Save the credentials for the next run
+        with open("Data/token.pickle", "w") as token:
+            token.write(creds.to_json())
+
+    @staticmethod
+    def _scheduleRefresh() -> None:
+        # Refresh the access token in the background shortly before it expires
+        creds = GoogleSession.credentials
+        if creds is None or creds.expiry is None or not creds.refresh_token:
+            return
+
+        # Credentials.expiry is a naive UTC datetime
+        delay = (creds.expiry - datetime.datetime.utcnow()).total_seconds() - GoogleSession.refreshMarginSeconds
+        GoogleSession.refreshTimer = threading.Timer(max(delay, 0.0), GoogleSession._refresh)
+        GoogleSession.refreshTimer.daemon = True
+        GoogleSession.refreshTimer.start()
+
+    @staticmethod
+    def _refresh() -> None:
+        with GoogleSession.lock:
+            try:
+                assert GoogleSession.credentials is not None
+                GoogleSession.credentials.refresh(Request())
+                GoogleSession._saveCredentials(GoogleSession.credentials)
+            except Exception as error:
+                # Requests will still refresh the token on demand
+                print(f"\tWARNING : Background token refresh failed; {error}")
+                return
+
+            GoogleSession._scheduleRefresh()
+
+    # ==========================================================================================
+    # ===================================== DISCOVERY CACHE ====================================
+    # ==========================================================================================
+
+    @staticmethod
+    def _getDiscoveryDocument(name: str, version: str) -> str:
+        # Discovery documents are cached per client library version, as the library may depend on their content
+        path = os.path.join(GoogleSession.DiscoveryCachePath, f"{name}.{version}.{googleapiclient.__version__}.json")
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf8") as f:
+                return f.read()
+
+        # Use the document shipped with the client library, or download it
+        document = get_static_doc(name, version)
+        if document is None:
+            uri = V2_DISCOVERY_URI.replace("{api}", name).replace("{apiVersion}", version)
+            (response, content) = httplib2.Http(timeout=GoogleSession.timeoutSeconds).request(uri)
+            if response.status >= 400:
+                raise IOError(f"ERROR : Discovery document for [{name} {version}] could not be retrieved ({response.status}).")
+            document = content.decode("utf8")
+
+        # Only cache valid documents
+        json.loads(document)
+        os.makedirs(GoogleSession.DiscoveryCachePath, exist_ok=True)
+        with open(path, "w", encoding="utf8") as f:
+            f.write(document)
+
+        return document
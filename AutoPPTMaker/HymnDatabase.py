@@ -0,0 +1,92 @@
+import contextlib
+import os
+import sqlite3
+import threading
+import urllib.parse
+
+from typing import Callable, Iterator, Optional, Tuple, Union
+
+from HymnTitleMatcher import HymnTitleMatcher
+from LyricsCodec import LyricsCodec
+
+"""
+
+Shared read-only connection to the hymn database, opened once per process instead of once per lookup.
+
+ - The database is opened through a "mode=ro" URI, and as "immutable" once GoogleAPITools has synced it,
+   which lets SQLite skip file locking altogether
+ - The connection is tuned with memory mapped I/O and a larger page cache, and caches prepared statements
+ - Threads share the connection through HymnDatabase.connect(), which serializes its use
+ - The connection is reopened whenever the database file changes; GoogleAPITools closes it before replacing the file
+
+"""
+
+
+class HymnDatabase:
+    DatabasePath = "Data/HymnDatabase.db"
+
+    MmapSizeBytes = 64 * 1024 * 1024
+    CacheSizeKB = 8 * 1024
+    CachedStatements = 256
+
+    con: Optional[sqlite3.Connection] = None
+    decoder: Optional[Callable[[Union[str, bytes]], str]] = None
+    fileSignature: Optional[Tuple[int, int, int]] = None
+    synced = False
+    lock = threading.RLock()
+
+    # ==========================================================================================
+    # ======================================= CONNECTION =======================================
+    # ==========================================================================================
+
+    @staticmethod
+    @contextlib.contextmanager
+    def connect() -> Iterator[sqlite3.Connection]:
+        # with HymnDatabase.connect() as con: ..., holding the connection for the duration of the block.
+        # HymnDatabase.decoder turns the Lyrics values read from it into text
+        with HymnDatabase.lock:
+            fileSignature = HymnDatabase._getFileSignature()
+            if HymnDatabase.con is None or fileSignature != HymnDatabase.fileSignature:
+                HymnDatabase.close()
+                HymnDatabase._open(fileSignature)
+            yield HymnDatabase.con
+
+    @staticmethod
+    def close() -> None:
+        # Must be called before the database file is replaced, as an immutable connection would not notice
+        with HymnDatabase.lock:
+            if HymnDatabase.con is not None:
+                HymnDatabase.con.close()
+                HymnDatabase.con = None
+                HymnDatabase.fileSignature = None
+
+    @staticmethod
+    def setSynced() -> None:
+        # The database file is final for the rest of the run, the next connection is opened as immutable
+        with HymnDatabase.lock:
+            HymnDatabase.synced = True
+            HymnDatabase.close()
+
+    @staticmethod
+    def _open(fileSignature: Tuple[int, int, int]) -> None:
+        uri = "file:" + urllib.parse.quote(os.path.abspath(HymnDatabase.DatabasePath)) + "?mode=ro"
+        if HymnDatabase.synced:
+            uri += "&immutable=1"
+
+        con = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=HymnDatabase.CachedStatements)
+        con.execute(f"PRAGMA mmap_size = {HymnDatabase.MmapSizeBytes}")
+        con.execute(f"PRAGMA cache_size = -{HymnDatabase.CacheSizeKB}")
+
+        HymnDatabase.con = con
+        HymnDatabase.fileSignature = fileSignature
+        HymnDatabase.decoder = LyricsCodec.getDecoder(con)
+
+        # Hymn names may have changed with the new file
+        HymnTitleMatcher.clear()
+        HymnTitleMatcher.load(con)
+
+    @staticmethod
+    def _getFileSignature() -> Tuple[int, int, int]:
+        # Raises FileNotFoundError if the database is missing
+        stat = os.stat(HymnDatabase.DatabasePath)
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
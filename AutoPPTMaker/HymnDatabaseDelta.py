@@ -0,0 +1,191 @@
+import base64
+import hashlib
+import json
+import sqlite3
+
+from typing import Any, Dict, List, Tuple
+
+from LyricsCodec import LyricsCodec
+
+"""
+
+Row level delta of the hymn database, so clients only download the rows changed since the last publish.
+
+ - The HymnRowHash table holds a content hash of every Hymn row, as of the last publish
+ - The digest of a database is the hash over all its row hashes, and identifies its content
+ - A changeset is a JSONL file; its first line is a header {"baseDigest", "digest", "databaseMd5"}, followed by one
+   {"op": "upsert", "row": [...]} or {"op": "delete", "key": [...]} line per changed row.
+   "databaseMd5" is the MD5 checksum of the published database file, tying the changeset to that exact file
+ - Compressed lyrics are preceded by {"op": "dictionary", "row": [...]} lines holding the LyricsDictionary rows they need
+
+Changesets are made by SQL/SQLPublishDelta.py and applied by GoogleAPITools.updateData().
+
+"""
+
+
+class HymnDatabaseDelta:
+    Columns = ("HymnName", "Version", "Number", "End", "Lyrics", "Comments")
+    KeyColumns = ("HymnName", "Version", "Number")
+
+    # ==========================================================================================
+    # ========================================= HASHING ========================================
+    # ==========================================================================================
+
+    @staticmethod
+    def getRowHash(row: Tuple[Any, ...]) -> str:
+        # 128 bits are plenty to tell rows apart, and keep the HymnRowHash table small (stored as 16 byte BLOBs)
+        return hashlib.sha256(json.dumps(HymnDatabaseDelta.encodeRow(row), ensure_ascii=False).encode("utf8")).hexdigest()[:32]
+
+    @staticmethod
+    def getRowHashMap(con: sqlite3.Connection) -> Dict[Tuple[Any, ...], Tuple[str, Tuple[Any, ...]]]:
+        # Maps the key of every Hymn row to its (hash, row)
+        rowHashMap = {}
+        for row in con.execute(f"SELECT {', '.join(HymnDatabaseDelta.Columns)} FROM Hymn"):
+            rowHashMap[tuple(row[:len(HymnDatabaseDelta.KeyColumns)])] = (HymnDatabaseDelta.getRowHash(row), tuple(row))
+        return rowHashMap
+
+    @staticmethod
+    def getDigest(rowHashList: List[str]) -> str:
+        # Order independent digest of a set of row hashes
+        return hashlib.sha256("\n".join(sorted(rowHashList)).encode("utf8")).hexdigest()
+
+    @staticmethod
+    def getDatabaseDigest(con: sqlite3.Connection) -> str:
+        return HymnDatabaseDelta.getDigest([rowHash for rowHash, _ in HymnDatabaseDelta.getRowHashMap(con).values()])
+
+    # ==========================================================================================
+    # ======================================== CHANGESETS ======================================
+    # ==========================================================================================
+
+    @staticmethod
+    def createChangeset(con: sqlite3.Connection) -> Tuple[dict, List[dict]]:
+        # Compares the Hymn table against the HymnRowHash table of the last publish, and brings the latter up to date.
+        # Returns the changeset header (without "databaseMd5", only known once the database is closed) and operations
+        con.execute("CREATE TABLE IF NOT EXISTS HymnRowHash(HymnName VARCHAR(255) NOT NULL, Version UNSIGNED TINYINT NOT NULL, "
+                    "Number UNSIGNED TINYINT NOT NULL, Hash BLOB NOT NULL, PRIMARY KEY (HymnName, Version, Number)) WITHOUT ROWID")
+
+        publishedHashMap = {tuple(row[:3]): row[3].hex() for row in con.execute("SELECT HymnName, Version, Number, Hash FROM HymnRowHash")}
+        rowHashMap = HymnDatabaseDelta.getRowHashMap(con)
+
+        operations: List[dict] = []
+        dictionaryIDs = set()
+        for key, (rowHash, row) in sorted(rowHashMap.items()):
+            if publishedHashMap.get(key) != rowHash:
+                operations.append({"op": "upsert", "row": HymnDatabaseDelta.encodeRow(row)})
+                dictionaryIDs.add(LyricsCodec.getDictionaryID(row[HymnDatabaseDelta.Columns.index("Lyrics")]))
+                con.execute("INSERT OR REPLACE INTO HymnRowHash (HymnName, Version, Number, Hash) VALUES (?, ?, ?, ?)", key + (bytes.fromhex(rowHash),))
+
+        # Dictionaries never change once created, and are sent along with every row compressed with them
+        for dictionaryID in sorted(dictionaryIDs - {None}, reverse=True):
+            row = con.execute("SELECT Id, Codec, Dictionary FROM LyricsDictionary WHERE Id = ?", (dictionaryID,)).fetchone()
+            operations.insert(0, {"op": "dictionary", "row": HymnDatabaseDelta.encodeRow(row)})
+
+        for key in sorted(publishedHashMap.keys() - rowHashMap.keys()):
+            operations.append({"op": "delete", "key": HymnDatabaseDelta.encodeRow(key)})
+            con.execute("DELETE FROM HymnRowHash WHERE HymnName = ? AND Version = ? AND Number = ?", key)
+
+        header = {"baseDigest": HymnDatabaseDelta.getDigest(list(publishedHashMap.values())),
+                  "digest": HymnDatabaseDelta.getDigest([rowHash for rowHash, _ in rowHashMap.values()])}
+        return (header, operations)
+
+    @staticmethod
+    def parseChangeset(content: str) -> Tuple[dict, List[dict]]:
+        lines = [json.loads(line) for line in content.splitlines() if line.strip()]
+        if not lines or "digest" not in lines[0]:
+            raise ValueError("Changeset header is missing.")
+        return (lines[0], lines[1:])
+
+    @staticmethod
+    def applyChangeset(con: sqlite3.Connection, header: dict, operations: List[dict]) -> bool:
+        # Applies a changeset in a single transaction, only if the database is at its base digest and ends up at its digest
+        if HymnDatabaseDelta.getDatabaseDigest(con) != header["baseDigest"]:
+            return False
+
+        # The HymnSearch triggers read the lyrics through lyricsText()
+        LyricsCodec.registerFunctions(con)
+
+        keyCondition = " AND ".join(f"{column} = ?" for column in HymnDatabaseDelta.KeyColumns)
+        keyLength = len(HymnDatabaseDelta.KeyColumns)
+        with con:
+            for operation in operations:
+                if operation["op"] == "upsert":
+                    # Deleting first, as INSERT OR REPLACE does not fire the delete triggers of the replaced row
+                    row = HymnDatabaseDelta.decodeRow(operation["row"])
+                    con.execute(f"DELETE FROM Hymn WHERE {keyCondition}", row[:keyLength])
+                    con.execute(f"INSERT INTO Hymn ({', '.join(HymnDatabaseDelta.Columns)}) "
+                                f"VALUES ({', '.join('?' * len(HymnDatabaseDelta.Columns))})", row)
+                elif operation["op"] == "dictionary":
+                    LyricsCodec.createDictionaryTable(con)
+                    con.execute("INSERT OR REPLACE INTO LyricsDictionary (Id, Codec, Dictionary) VALUES (?, ?, ?)",
+                                HymnDatabaseDelta.decodeRow(operation["row"]))
+                elif operation["op"] == "delete":
+                    con.execute(f"DELETE FROM Hymn WHERE {keyCondition}", HymnDatabaseDelta.decodeRow(operation["key"]))
+                else:
+                    raise ValueError(f"Unknown changeset operation [{operation['op']}].")
+
+            if HymnDatabaseDelta.getDatabaseDigest(con) != header["digest"]:
+                # Leaving the block with an exception rolls the transaction back
+                raise ValueError("Database digest does not match the changeset after applying it.")
+
+        return True
+
+    # ==========================================================================================
+    # ========================================== TOOLS =========================================
+    # ==========================================================================================
+
+    @staticmethod
+    def encodeRow(row: Tuple[Any, ...]) -> List[Any]:
+        # JSON compatible row values; binary values are stored as {"base64": ...}
+        return [{"base64": base64.b64encode(value).decode("ascii")} if isinstance(value, bytes) else value for value in row]
+
+    @staticmethod
+    def decodeRow(row: List[Any]) -> Tuple[Any, ...]:
+        return tuple(base64.b64decode(value["base64"]) if isinstance(value, dict) else value for value in row)
+
+# ==============================================================================================
+# ============================================ TESTER ==========================================
+# ==============================================================================================
+
+
+if __name__ == "__main__":
+    # python HymnDatabaseDelta.py, publishes changes to an in-memory copy of the hymn database and applies them to another
+    publisherCon = sqlite3.connect(":memory:")
+    sqlite3.connect("Data/HymnDatabase.db").backup(publisherCon)
+    HymnDatabaseDelta.createChangeset(publisherCon)
+    publisherCon.commit()
+
+    clientCon = sqlite3.connect(":memory:")
+    publisherCon.backup(clientCon)
+
+    # Nothing changed since the last publish
+    (header, operations) = HymnDatabaseDelta.createChangeset(publisherCon)
+    assert operations == [] and header["baseDigest"] == header["digest"] == HymnDatabaseDelta.getDatabaseDigest(clientCon)
+
+    LyricsCodec.registerFunctions(publisherCon)
+    (hymnName, number) = publisherCon.execute("SELECT HymnName, Number FROM Hymn WHERE Version = 1 ORDER BY HymnName, Number").fetchone()
+    publisherCon.execute("UPDATE Hymn SET Lyrics = 'Changed verse' WHERE HymnName = ? AND Version = 1 AND Number = ?", (hymnName, number))
+    publisherCon.execute("INSERT INTO Hymn (HymnName, Version, Number, End, Lyrics, Comments) VALUES ('NEW HYMN', 1, 1, 1, 'New verse', '')")
+    deletedHymnName = publisherCon.execute("SELECT MAX(HymnName) FROM Hymn WHERE HymnName != 'NEW HYMN'").fetchone()[0]
+    deletedRows = publisherCon.execute("DELETE FROM Hymn WHERE HymnName = ?", (deletedHymnName,)).rowcount
+
+    (header, operations) = HymnDatabaseDelta.createChangeset(publisherCon)
+    content = "\n".join(json.dumps(line, ensure_ascii=False) for line in [header] + operations)
+    assert [operation["op"] for operation in operations if operation["op"] != "dictionary"] == ["upsert"] * 2 + ["delete"] * deletedRows, operations
+
+    # A changeset ending on the wrong digest is rolled back entirely
+    (parsedHeader, parsedOperations) = HymnDatabaseDelta.parseChangeset(content)
+    clientDigest = HymnDatabaseDelta.getDatabaseDigest(clientCon)
+    try:
+        HymnDatabaseDelta.applyChangeset(clientCon, dict(parsedHeader, digest="0" * 64), parsedOperations)
+        raise AssertionError("Changeset with a wrong digest was applied.")
+    except ValueError:
+        assert HymnDatabaseDelta.getDatabaseDigest(clientCon) == clientDigest
+
+    assert HymnDatabaseDelta.applyChangeset(clientCon, parsedHeader, parsedOperations)
+    assert HymnDatabaseDelta.getDatabaseDigest(clientCon) == HymnDatabaseDelta.getDatabaseDigest(publisherCon) == header["digest"]
+    assert clientCon.execute("SELECT Lyrics FROM Hymn WHERE HymnName = 'NEW HYMN'").fetchone() == ("New verse",)
+
+    # The client is no longer at the base digest of the changeset
+    assert not HymnDatabaseDelta.applyChangeset(clientCon, parsedHeader, parsedOperations)
+
+    print("All changesets passed.")
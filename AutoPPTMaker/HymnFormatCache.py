@@ -0,0 +1,79 @@
+import hashlib
+import json
+import sqlite3
+import threading
+
+from typing import List, Optional
+
+"""
+
+Cache of formatted hymn slide texts (see HymnMaker), kept in a database of its own next to the hymn database,
+which is read-only and replaced whenever it is updated from Google Drive.
+
+Entries are keyed by hymn name, a hash of the lyrics, the layout properties of the slide type, and the formatter
+version, so changed lyrics or properties simply miss the cache; the stale entry is overwritten on the next store.
+Bump FormatterVersion whenever the output of HymnMaker._getFormattedLyrics() changes for the same input.
+
+"""
+
+
+class HymnFormatCache:
+    CachePath = "Data/HymnFormatCache.db"
+    FormatterVersion = 1
+
+    con: Optional[sqlite3.Connection] = None
+    lock = threading.Lock()
+
+    # ==========================================================================================
+    # ========================================== CACHE =========================================
+    # ==========================================================================================
+
+    @staticmethod
+    def get(hymnName: str, lyrics: str, maxLines: int, minLines: int, maxLineLength: int) -> Optional[List[str]]:
+        # Formatted slide texts of the hymn, or None if they are not cached for these lyrics and properties
+        try:
+            with HymnFormatCache.lock:
+                row = HymnFormatCache._getConnection().execute(
+                    "SELECT Slides FROM HymnFormat WHERE HymnName = ? AND LyricsHash = ? AND MaxLines = ? AND MinLines = ? "
+                    "AND MaxLineLength = ? AND FormatterVersion = ?",
+                    (hymnName, HymnFormatCache.getLyricsHash(lyrics), maxLines, minLines, maxLineLength, HymnFormatCache.FormatterVersion)).fetchone()
+        except sqlite3.Error as error:
+            print(f"\tWARNING : Formatted hymn cache could not be read; {error}")
+            return None
+
+        return json.loads(row[0]) if row else None
+
+    @staticmethod
+    def put(hymnName: str, lyrics: str, maxLines: int, minLines: int, maxLineLength: int, formattedLyricsList: List[str]) -> None:
+        try:
+            with HymnFormatCache.lock:
+                con = HymnFormatCache._getConnection()
+                with con:
+                    # Replaces the entry of older lyrics or formatter versions, which is never read again
+                    con.execute("INSERT OR REPLACE INTO HymnFormat (HymnName, LyricsHash, MaxLines, MinLines, MaxLineLength, FormatterVersion, Slides) "
+                                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                (hymnName, HymnFormatCache.getLyricsHash(lyrics), maxLines, minLines, maxLineLength,
+                                 HymnFormatCache.FormatterVersion, json.dumps(formattedLyricsList, ensure_ascii=False)))
+        except sqlite3.Error as error:
+            print(f"\tWARNING : Formatted hymn cache could not be saved; {error}")
+
+    @staticmethod
+    def getLyricsHash(lyrics: str) -> str:
+        return hashlib.sha256(lyrics.encode("utf8")).hexdigest()
+
+    # ==========================================================================================
+    # ======================================== DATABASE ========================================
+    # ==========================================================================================
+
+    @staticmethod
+    def _getConnection() -> sqlite3.Connection:
+        # Opened once per process; WAL lets several processes (i.e., HymnMaker batch runs) read while one writes
+        if HymnFormatCache.con is None:
+            con = sqlite3.connect(HymnFormatCache.CachePath, timeout=10, check_same_thread=False)
+            con.execute("PRAGMA journal_mode = WAL")
+            con.execute("CREATE TABLE IF NOT EXISTS HymnFormat(HymnName VARCHAR(255) NOT NULL, LyricsHash CHAR(64) NOT NULL, "
+                        "MaxLines UNSIGNED TINYINT NOT NULL, MinLines UNSIGNED TINYINT NOT NULL, MaxLineLength INTEGER NOT NULL, "
+                        "FormatterVersion INTEGER NOT NULL, Slides TEXT NOT NULL, "
+                        "PRIMARY KEY (HymnName, MaxLines, MinLines, MaxLineLength))")
+            HymnFormatCache.con = con
+        return HymnFormatCache.con
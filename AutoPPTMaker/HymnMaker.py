@@ -1,11 +1,16 @@
+import concurrent.futures
 import configparser
+import json
 import math
 import re
 import sys
 import os
+import time
 
-from typing import Any, List
+from typing import Any, Dict, List, Optional, Tuple
 
+from HymnDatabase import HymnDatabase
+from HymnFormatCache import HymnFormatCache
 from LookupTools import LookupTools
 from Utility import Utility
 
@@ -39,6 +44,10 @@ class HymnMaker:
         self.hymnTitle = hymnTitle
         self.hymn = LookupTools.getHymn(hymnTitle)
 
+        # Titles are taken from the database when the given one had typos
+        if self.hymn.get("fuzzyMatch"):
+            self.hymnTitle = self.hymn["title"]
+
         return (self.hymn["title"] != "Not Found" and self.hymn["lyrics"] != "Not Found")
 
     def getContent(self) -> List[Any]:
@@ -46,7 +55,13 @@ class HymnMaker:
         formattedLyricsList = []
 
         if (self.hymn != ""):
-            formattedLyricsList = self._getFormattedLyrics(self.hymn["lyrics"])
+            # Formatting only depends on the lyrics and the layout properties, see HymnFormatCache
+            cacheKey = (self.hymn["title"], self.hymn["lyrics"], self.maxLines, self.minLines, self.maxLineLength)
+            formattedLyricsList = HymnFormatCache.get(*cacheKey) if self.hymn["lyrics"] else None
+            if formattedLyricsList is None:
+                formattedLyricsList = self._getFormattedLyrics(self.hymn["lyrics"])
+                if self.hymn["lyrics"]:
+                    HymnFormatCache.put(*cacheKey, formattedLyricsList)
 
             # Generate titles and numbering
             slides = len(formattedLyricsList)
@@ -254,12 +269,96 @@ class HymnMaker:
         # Remove new lines before and after text
         return verse.strip() + "\n"
 
+    # ==============================================================================================
+    # =========================================== BATCH ============================================
+    # ==============================================================================================
+
+    # Slide types formatted by the batch check, and the formatter of each in a batch worker process
+    BatchTypeList = ["Stream", "Projected", "Regular"]
+    batchMakerMap: Dict[str, "HymnMaker"] = {}
+
+    @staticmethod
+    def runBatch(reportPath: str, workers: Optional[int] = None) -> None:
+        # Formats every hymn of the database for every slide type across a process pool, writing one JSONL line per result
+        start = time.perf_counter()
+
+        # Lyrics are read once here rather than looked up by name in every worker
+        hymnMap: Dict[str, List[str]] = {}
+        with HymnDatabase.connect() as con:
+            for row in con.execute("SELECT HymnName, Lyrics FROM Hymn WHERE Version = 1 ORDER BY HymnName, Number"):
+                hymnMap.setdefault(row[0], []).append(HymnDatabase.decoder(row[1]))
+        taskList = [(type, hymnName, "\n\n".join(verseList)) for type in HymnMaker.BatchTypeList for hymnName, verseList in hymnMap.items()]
+
+        anomalies = 0
+        formatSeconds = 0.0
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=HymnMaker._initializeBatchWorker) as executor, \
+                open(reportPath, "w", encoding="utf8") as f:
+            for result in executor.map(HymnMaker._formatBatchTask, taskList, chunksize=8):
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+                anomalies += len(result["anomalies"])
+                formatSeconds += result["milliseconds"] / 1000
+
+        elapsed = time.perf_counter() - start
+        print(f"Formatted [{len(hymnMap)}] hymns x [{len(HymnMaker.BatchTypeList)}] slide types in {elapsed:.2f} seconds "
+              f"({len(taskList) / elapsed:.1f} hymns/s, {formatSeconds:.2f} seconds of formatting).")
+        print(f"Found [{anomalies}] anomalies, see [{reportPath}].")
+
+    @staticmethod
+    def _initializeBatchWorker() -> None:
+        for type in HymnMaker.BatchTypeList:
+            HymnMaker.batchMakerMap[type] = HymnMaker(type)
+
+    @staticmethod
+    def _formatBatchTask(task: Tuple[str, str, str]) -> dict:
+        (type, hymnName, lyrics) = task
+        hm = HymnMaker.batchMakerMap[type]
+
+        start = time.perf_counter()
+        formattedLyricsList = hm._getFormattedLyrics(lyrics)
+        elapsed = time.perf_counter() - start
+
+        return {
+            "type": type,
+            "hymn": hymnName,
+            "slides": len(formattedLyricsList),
+            "milliseconds": round(1000 * elapsed, 3),
+            "anomalies": hm._getAnomalies(formattedLyricsList)
+        }
+
+    def _getAnomalies(self, formattedLyricsList: List[str]) -> List[dict]:
+        # Slides the formatter should not have produced with the current properties
+        anomalyList: List[dict] = []
+        if not formattedLyricsList:
+            anomalyList.append({"slide": None, "anomaly": "noSlides"})
+
+        for i, slide in enumerate(formattedLyricsList):
+            lineList = slide.strip("\n").split("\n")
+            if slide.strip() == "":
+                anomalyList.append({"slide": i + 1, "anomaly": "emptySlide"})
+                continue
+
+            if len(lineList) > self.maxLines:
+                anomalyList.append({"slide": i + 1, "anomaly": "oversizedSlide", "lines": len(lineList)})
+            if "\n\n\n" in slide:
+                anomalyList.append({"slide": i + 1, "anomaly": "emptyBlock"})
+
+            for line in lineList:
+                length = Utility.getVisualLength(line)
+                if length > self.maxLineLength:
+                    anomalyList.append({"slide": i + 1, "anomaly": "longLine", "length": length, "line": line})
+
+        return anomalyList
+
 # ==============================================================================================
 # ============================================ TESTER ==========================================
 # ==============================================================================================
 
 
 if __name__ == "__main__":
+    # python HymnMaker.py -b [report.jsonl]
+    if (len(sys.argv) > 1 and sys.argv[1] == "-b"):
+        HymnMaker.runBatch(sys.argv[2] if len(sys.argv) > 2 else "HymnFormatReport.jsonl")
+
     # python HymnMaker.py [type] [hymn name]
     type = ""
     if (len(sys. argv) > 2):
@@ -0,0 +1,175 @@
+import re
+import sqlite3
+
+from typing import List, Optional, Tuple
+
+from LyricsCodec import LyricsCodec
+
+"""
+
+FTS5 full-text index over the hymn titles and lyrics, one index row per Hymn row (verse).
+The index is kept in sync with the Hymn table by triggers, which read the lyrics through the lyricsText() SQL
+function; every connection writing to the Hymn table must therefore call LyricsCodec.registerFunctions() first.
+
+The index reads its content from the Hymn table (external content) and only records which column a word is in,
+so it adds little to the database next to the compressed lyrics (see LyricsCodec).
+
+Titles are matched word by word, with the last word as a prefix (i.e., "amazing gr" finds "AMAZING GRACE"),
+and ranked with bm25. Lyrics are matched by all their words, then checked for the exact line in the decoded verse.
+
+The index is created offline with SQL/SQLCreateSearchIndex.py; databases without it fall back to LIKE lookups.
+
+"""
+
+
+class HymnSearch:
+    # Compressed lyrics cannot be read back by the index, so every row is added and removed with its decoded text
+    CreateStatements = [
+        "CREATE VIRTUAL TABLE HymnSearch USING fts5(HymnName, Lyrics, Version UNINDEXED, Number UNINDEXED, "
+        "content='Hymn', detail=column, tokenize='unicode61 remove_diacritics 2')",
+
+        "CREATE TRIGGER HymnSearchInsert AFTER INSERT ON Hymn BEGIN "
+        "INSERT INTO HymnSearch (rowid, HymnName, Lyrics, Version, Number) "
+        "VALUES (new.rowid, new.HymnName, lyricsText(new.Lyrics), new.Version, new.Number); END",
+
+        "CREATE TRIGGER HymnSearchDelete AFTER DELETE ON Hymn BEGIN "
+        "INSERT INTO HymnSearch (HymnSearch, rowid, HymnName, Lyrics, Version, Number) "
+        "VALUES ('delete', old.rowid, old.HymnName, lyricsText(old.Lyrics), old.Version, old.Number); END",
+
+        "CREATE TRIGGER HymnSearchUpdate AFTER UPDATE ON Hymn BEGIN "
+        "INSERT INTO HymnSearch (HymnSearch, rowid, HymnName, Lyrics, Version, Number) "
+        "VALUES ('delete', old.rowid, old.HymnName, lyricsText(old.Lyrics), old.Version, old.Number); "
+        "INSERT INTO HymnSearch (rowid, HymnName, Lyrics, Version, Number) "
+        "VALUES (new.rowid, new.HymnName, lyricsText(new.Lyrics), new.Version, new.Number); END",
+    ]
+
+    # ==========================================================================================
+    # ========================================== INDEX =========================================
+    # ==========================================================================================
+
+    @staticmethod
+    def createIndex(con: sqlite3.Connection) -> int:
+        # (Re)creates the index and its triggers, and fills it from the Hymn table; returns the number of indexed rows
+        LyricsCodec.registerFunctions(con)
+        for trigger in ("HymnSearchInsert", "HymnSearchDelete", "HymnSearchUpdate"):
+            con.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        con.execute("DROP TABLE IF EXISTS HymnSearch")
+        for statement in HymnSearch.CreateStatements:
+            con.execute(statement)
+
+        con.execute("INSERT INTO HymnSearch (rowid, HymnName, Lyrics, Version, Number) "
+                    "SELECT rowid, HymnName, lyricsText(Lyrics), Version, Number FROM Hymn")
+        con.execute("INSERT INTO HymnSearch (HymnSearch) VALUES ('optimize')")
+
+        return con.execute("SELECT COUNT(*) FROM Hymn").fetchone()[0]
+
+    @staticmethod
+    def hasIndex(con: sqlite3.Connection) -> bool:
+        return con.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'HymnSearch'").fetchone() is not None
+
+    # ==========================================================================================
+    # ========================================= SEARCH =========================================
+    # ==========================================================================================
+
+    @staticmethod
+    def searchTitle(con: sqlite3.Connection, name: str, limit: int = 10) -> List[str]:
+        # Hymn names matching every word of the name, best match first; an exact title always comes first
+        query = HymnSearch._getQuery(name, prefix=True)
+        if not query:
+            return []
+
+        hymnNameList = [row[0] for row in con.execute(
+            "SELECT HymnName FROM HymnSearch WHERE HymnSearch MATCH ? AND Version = 1 AND Number = 1 ORDER BY rank LIMIT ?",
+            ("HymnName : (" + query + ")", limit))]
+
+        normalizedName = HymnSearch.normalize(name)
+        hymnNameList.sort(key=lambda hymnName: HymnSearch.normalize(hymnName) != normalizedName)
+        return hymnNameList
+
+    @staticmethod
+    def searchLyrics(con: sqlite3.Connection, line: str, limit: int = 10) -> List[Tuple[str, int, str]]:
+        # (hymn name, verse number, verse excerpt) of the verses holding the line, best match first
+        query = HymnSearch._getQuery(line, prefix=False)
+        if not query:
+            return []
+
+        # The index only knows which verses hold every word, the line itself is looked for in the decoded verses
+        phrase = " " + HymnSearch.normalize(line) + " "
+        decode = LyricsCodec.getDecoder(con)
+        resultList: List[Tuple[str, int, str]] = []
+        for row in con.execute("SELECT HymnName, Number, Lyrics FROM HymnSearch WHERE HymnSearch MATCH ? AND Version = 1 ORDER BY rank",
+                               ("Lyrics : (" + query + ")",)):
+            excerpt = HymnSearch._getExcerpt(decode(row[2]), phrase)
+            if excerpt is not None:
+                resultList.append((row[0], row[1], excerpt))
+                if len(resultList) == limit:
+                    break
+
+        return resultList
+
+    # ==========================================================================================
+    # ========================================== TOOLS =========================================
+    # ==========================================================================================
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        # Lower case words without punctuation, i.e., "Be Still, My Soul" -> "be still my soul"
+        return " ".join(re.findall(r"\w+", text.lower()))
+
+    @staticmethod
+    def _getQuery(text: str, prefix: bool) -> Optional[str]:
+        # FTS5 query with every word quoted, so user input can never be read as query syntax.
+        # Callers wrap it in parentheses, as a column filter only applies to the phrase right after it
+        words = HymnSearch.normalize(text).split()
+        if not words:
+            return None
+
+        return " ".join(f'"{word}"' for word in words) + ("*" if prefix else "")
+
+    @staticmethod
+    def _getExcerpt(lyrics: str, phrase: str) -> Optional[str]:
+        # The fewest consecutive lines holding the normalized phrase (padded with spaces), joined by " / "
+        lineList = [line.strip() for line in lyrics.split("\n") if line.strip()]
+        for length in range(1, len(lineList) + 1):
+            for i in range(len(lineList) - length + 1):
+                if phrase in " " + HymnSearch.normalize(" ".join(lineList[i:i + length])) + " ":
+                    return " / ".join(lineList[i:i + length])
+        return None
+
+# ==============================================================================================
+# ============================================ TESTER ==========================================
+# ==============================================================================================
+
+
+if __name__ == "__main__":
+    # python HymnSearch.py, checks searches against an indexed in-memory copy of the hymn database
+    con = sqlite3.connect(":memory:")
+    sqlite3.connect("Data/HymnDatabase.db").backup(con)
+    print(f"Indexed [{HymnSearch.createIndex(con)}] verses.")
+
+    # Every word of a partial title must be in the title, not only the first one
+    for (name, hymnName) in [("IT IS", "IT IS WELL WITH MY SOUL"), ("PRAISE TO", "PRAISE TO THE LORD, THE ALMIGHTY"),
+                             ("WORTHY IS", "WORTHY IS THE LAMB"), ("amazing gr", "AMAZING GRACE"),
+                             ("be still, my soul", "BE STILL, MY SOUL")]:
+        result = HymnSearch.searchTitle(con, name)
+        assert result and result[0] == hymnName, f"[{name}] found {result[:3]} instead of [{hymnName}]"
+
+    for hymnName in [row[0] for row in con.execute("SELECT DISTINCT HymnName FROM Hymn WHERE Version = 1")]:
+        words = HymnSearch.normalize(hymnName).split()
+        for length in range(1, len(words) + 1):
+            for result in HymnSearch.searchTitle(con, " ".join(words[:length])):
+                resultWords = HymnSearch.normalize(result).split()
+                assert all(word in resultWords for word in words[:length - 1]), f"[{' '.join(words[:length])}] found [{result}]"
+
+    resultList = HymnSearch.searchLyrics(con, "how sweet the sound")
+    assert ("AMAZING GRACE", 1) in [result[:2] for result in resultList], f"Lyrics search found {resultList[:3]}"
+
+    # The triggers keep the index in sync with the Hymn table
+    con.execute("UPDATE Hymn SET Lyrics = 'Zebra quokka line' WHERE HymnName = 'AMAZING GRACE' AND Number = 1")
+    assert [result[0] for result in HymnSearch.searchLyrics(con, "zebra quokka")] == ["AMAZING GRACE"]
+    assert ("AMAZING GRACE", 1) not in [result[:2] for result in HymnSearch.searchLyrics(con, "how sweet the sound")]
+    con.execute("DELETE FROM Hymn WHERE HymnName = 'AMAZING GRACE'")
+    assert HymnSearch.searchLyrics(con, "zebra quokka") == []
+    con.execute("INSERT INTO HymnSearch (HymnSearch) VALUES ('integrity-check')")
+
+    print("All searches passed.")
@@ -0,0 +1,110 @@
+import collections
+import sqlite3
+import threading
+
+from typing import Dict, List, Optional, Tuple
+
+from HymnSearch import HymnSearch
+
+"""
+
+Trigram index over all hymn names, for finding the intended hymn despite typos (i.e., "Make me a Chanel").
+The index is built once per process, when the hymn database is opened (see HymnDatabase), and kept in memory.
+
+Scores range from 0 to 1, averaging how much of the input is found in the title and how similar both are in full,
+so that a short input matching the start of a long title still ranks well.
+
+"""
+
+
+class HymnTitleMatcher:
+    # Minimum score to use the best match in place of the given name, and minimum score for a suggestion
+    MatchThreshold = 0.6
+    SuggestionThreshold = 0.3
+
+    # The best match is only used if it scores clearly above the runner up, i.e., not for "Jesus"
+    MatchMargin = 0.05
+
+    hymnNameList: List[str] = []
+    trigramCountList: List[int] = []
+    trigramIndex: Dict[str, List[int]] = {}
+    loaded = False
+    loadLock = threading.Lock()
+
+    # ==========================================================================================
+    # ========================================== INDEX =========================================
+    # ==========================================================================================
+
+    @staticmethod
+    def load(con: sqlite3.Connection) -> None:
+        with HymnTitleMatcher.loadLock:
+            if HymnTitleMatcher.loaded:
+                return
+
+            hymnNameList = [row[0] for row in con.execute("SELECT DISTINCT HymnName FROM Hymn ORDER BY HymnName")]
+            trigramIndex: Dict[str, List[int]] = collections.defaultdict(list)
+            trigramCountList = []
+            for i, hymnName in enumerate(hymnNameList):
+                trigrams = HymnTitleMatcher.getTrigrams(hymnName)
+                trigramCountList.append(len(trigrams))
+                for trigram in trigrams:
+                    trigramIndex[trigram].append(i)
+
+            HymnTitleMatcher.hymnNameList = hymnNameList
+            HymnTitleMatcher.trigramCountList = trigramCountList
+            HymnTitleMatcher.trigramIndex = dict(trigramIndex)
+            HymnTitleMatcher.loaded = True
+
+    @staticmethod
+    def clear() -> None:
+        with HymnTitleMatcher.loadLock:
+            HymnTitleMatcher.loaded = False
+
+    @staticmethod
+    def getTrigrams(text: str) -> set:
+        # Words are padded so that their first and last letters weigh in, i.e., "grace" -> "  g", " gr", ..., "ce "
+        trigrams = set()
+        for word in HymnSearch.normalize(text).split():
+            paddedWord = "  " + word + " "
+            for i in range(len(paddedWord) - 2):
+                trigrams.add(paddedWord[i:i + 3])
+        return trigrams
+
+    # ==========================================================================================
+    # ========================================= MATCHING =======================================
+    # ==========================================================================================
+
+    @staticmethod
+    def getSuggestions(con: sqlite3.Connection, name: str, limit: int = 5) -> List[Tuple[str, float]]:
+        # (hymn name, score) of the closest hymn names, best first
+        HymnTitleMatcher.load(con)
+
+        trigrams = HymnTitleMatcher.getTrigrams(name)
+        if not trigrams:
+            return []
+
+        commonCounter: Dict[int, int] = collections.Counter()
+        for trigram in trigrams:
+            for i in HymnTitleMatcher.trigramIndex.get(trigram, ()):
+                commonCounter[i] += 1
+
+        suggestionList = []
+        for i, common in commonCounter.items():
+            coverage = common / len(trigrams)
+            similarity = 2 * common / (len(trigrams) + HymnTitleMatcher.trigramCountList[i])
+            score = (coverage + similarity) / 2
+            if score >= HymnTitleMatcher.SuggestionThreshold:
+                suggestionList.append((HymnTitleMatcher.hymnNameList[i], score))
+
+        suggestionList.sort(key=lambda suggestion: (-suggestion[1], suggestion[0]))
+        return suggestionList[:limit]
+
+    @staticmethod
+    def getBestMatch(con: sqlite3.Connection, name: str) -> Optional[Tuple[str, float]]:
+        # (hymn name, score) of the closest hymn name, only if it is confident enough to be used without asking
+        suggestionList = HymnTitleMatcher.getSuggestions(con, name, 2)
+        if not suggestionList or suggestionList[0][1] < HymnTitleMatcher.MatchThreshold:
+            return None
+        if len(suggestionList) > 1 and suggestionList[0][1] - suggestionList[1][1] < HymnTitleMatcher.MatchMargin:
+            return None
+        return suggestionList[0]
@@ -2,14 +2,12 @@ import datetime
 import getpass
 import configparser
 import googleapiclient
-import os
 
 from enum import Enum
 from apiclient import errors
-from googleapiclient.discovery import build
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
+
+from GoogleSession import GoogleSession
+from RequestExecutor import RequestExecutor
 
 
 class Logging:
@@ -36,26 +34,7 @@ class Logging:
             return
 
         print("INITIALIZING LOGGING")
-        # Refer to https://developers.google.com/slides/api/quickstart/python
-        creds = None
-        # The file token.pickle stores the user's access and refresh tokens, and is
-        # created automatically when the authorization flow completes for the first
-        # time.
-        if os.path.exists("Data/token.pickle"):
-            creds = Credentials.from_authorized_user_file("Data/token.pickle", ["https://www.googleapis.com/auth/spreadsheets"])
-        # If there are no (valid) credentials available, let the user log in.
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    "Data/credentials.json", ["https://www.googleapis.com/auth/spreadsheets"])
-                creds = flow.run_local_server(port=0)
-            # Save the credentials for the next run
-            with open("Data/token.pickle", "w") as token:
-                token.write(creds.to_json())
-
-        Logging.sheetService = build("sheets", "v4", credentials=creds)
+        Logging.sheetService = GoogleSession.getService("sheets", "v4")
 
     @staticmethod
     def writeLog(logType: LogType, msg: str) -> None:
@@ -98,7 +77,9 @@ class Logging:
         }
 
         try:
-            Logging.sheetService.spreadsheets().batchUpdate(spreadsheetId=sheetID, body=batchUpdateRequest).execute()
+            # Sent again, the log row would be inserted twice
+            RequestExecutor.execute(Logging.sheetService.spreadsheets().batchUpdate(spreadsheetId=sheetID, body=batchUpdateRequest), "sheets",
+                                    write=True, idempotent=False)
         except errors.HttpError as error:
             print(f"\tERROR: An error occurred on logging data; {error}")
 
@@ -1,7 +1,14 @@
+import concurrent.futures
 import sys
+import threading
+import time
 import requests
-import sqlite3
-from typing import Union
+from typing import Dict, List, Optional, Tuple, Union
+
+from HymnDatabase import HymnDatabase
+from HymnSearch import HymnSearch
+from HymnTitleMatcher import HymnTitleMatcher
+from PassageCache import PassageCache
 
 """
 
@@ -13,41 +20,71 @@ the SQL server provides better lookup accuracy than the web.
 
 
 class LookupTools:
+    # ESV requests share one keep-alive session, with at most VersePrefetchWorkers connections
+    VerseTimeoutSeconds = 15
+    VersePrefetchWorkers = 8
+
+    session: Optional[requests.Session] = None
+    sessionLock = threading.Lock()
+
     @staticmethod
     def getHymn(name: str) -> dict:
         start = 0
         end = 0
         hymnName = ""
         lyrics = ""
+        fuzzyMatch = False
 
         # ==========================================================================================
         # ====================================== SQL LOOKUP ========================================
         # ==========================================================================================
 
-        con = sqlite3.connect("Data/HymnDatabase.db")
-
-        for row in con.execute(f"SELECT * FROM Hymn WHERE Replace(HymnName, ',', '') LIKE \"%{name.replace(',', '')}%\" \
-                                                AND VERSION = 1 ORDER BY HymnName, Number"):
-            hymnName = row[0]
-            start = row[2]
-            end = row[3]
-
-            lyrics += row[4] + ("\n\n" if start != end else "")
-
-            # In case there're multiple matches
-            if start == end:
-                break
-
-        con.close()
+        # Lyrics may be stored compressed, see LyricsCodec
+        decodeTime = 0.0
+
+        # The connection is shared for the whole run, see HymnDatabase
+        with HymnDatabase.connect() as con:
+            # Best title match from the full-text index, or the first name holding the given text on older databases
+            hymnNameList = HymnSearch.searchTitle(con, name) if HymnSearch.hasIndex(con) else []
+            if not hymnNameList:
+                hymnNameList = [row[0] for row in con.execute(
+                    "SELECT HymnName FROM Hymn WHERE Replace(HymnName, ',', '') LIKE ? AND Version = 1 ORDER BY HymnName LIMIT 1",
+                    ("%" + name.replace(",", "") + "%",))]
+
+            # Typos, i.e., "Make me a Chanel", only go through if the closest hymn name is a confident match
+            if not hymnNameList:
+                bestMatch = HymnTitleMatcher.getBestMatch(con, name)
+                if bestMatch:
+                    print(f"\tWARNING : Hymn [{name}] not found, using the closest match [{bestMatch[0]}] (score {bestMatch[1]:.2f}).")
+                    hymnNameList = [bestMatch[0]]
+                    fuzzyMatch = True
+                else:
+                    suggestionList = HymnTitleMatcher.getSuggestions(con, name)
+                    if suggestionList:
+                        print(f"\tWARNING : Hymn [{name}] not found, did you mean: {', '.join(f'[{hymnName}]' for hymnName, _ in suggestionList)}?")
+
+            rows = con.execute("SELECT * FROM Hymn WHERE HymnName = ? AND Version = 1 ORDER BY Number", hymnNameList[:1]) if hymnNameList else []
+            for row in rows:
+                hymnName = row[0]
+                start = row[2]
+                end = row[3]
+
+                decodeStart = time.perf_counter()
+                lyrics += HymnDatabase.decoder(row[4]) + ("\n\n" if start != end else "")
+                decodeTime += time.perf_counter() - decodeStart
+
+                if start == end:
+                    break
 
         if start != end:
             print(f"ERROR: Database consistency error, {start}/{end} lyrics found.")
         elif len(lyrics) > 0:
-            print("  LYRICS SOURCE: SQL")
+            print(f"  LYRICS SOURCE: SQL (decoded in {1000 * decodeTime:.2f} ms)")
             return {
                 "source": "SQL",
                 "title": hymnName,
-                "lyrics": lyrics
+                "lyrics": lyrics,
+                "fuzzyMatch": fuzzyMatch
             }
 
         # ==========================================================================================
@@ -55,9 +92,16 @@ class LookupTools:
         return {
             "source": "None",
             "title": name,
-            "lyrics": ""
+            "lyrics": "",
+            "fuzzyMatch": False
         }
 
+    @staticmethod
+    def getHymnSuggestions(name: str, limit: int = 5) -> List[Tuple[str, float]]:
+        # (hymn name, score) of the hymn names closest to the given name, best first
+        with HymnDatabase.connect() as con:
+            return HymnTitleMatcher.getSuggestions(con, name, limit)
+
     @staticmethod
     def getVerse(passage: str) -> str:
         # ESV Bible Verse Lookup ID
@@ -74,17 +118,61 @@ class LookupTools:
             "include-passage-references": False
         }
 
+        # Passages rarely change, see PassageCache
+        cachedPassage = PassageCache.get(passage, params)
+        if cachedPassage is not None:
+            return cachedPassage
+
         headers = {
             "Authorization": "Token %s" % ESV_API_KEY
         }
 
-        response = requests.get(
-            ESV_API_URL, params=params, headers=headers)
+        response = LookupTools._getSession().get(
+            ESV_API_URL, params=params, headers=headers, timeout=LookupTools.VerseTimeoutSeconds)
 
         passages = response.json()["passages"]
 
+        # Unknown references are not cached, they are most likely typos that will be fixed
+        if passages:
+            PassageCache.put(passage, params, passages[0].strip())
+
         return passages[0].strip() if passages else "Not Found"
 
+    @staticmethod
+    def prefetchVerses(passageList: List[str]) -> Dict[str, bool]:
+        # Looks up the passages concurrently, so that getVerse() serves them from PassageCache later in the run;
+        # returns whether each unique passage was found
+        uniquePassageMap: Dict[str, str] = {}
+        for passage in passageList:
+            if passage.strip():
+                uniquePassageMap.setdefault(" ".join(passage.upper().split()), passage.strip())
+
+        resultMap: Dict[str, bool] = {}
+        if not uniquePassageMap:
+            return resultMap
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=LookupTools.VersePrefetchWorkers) as executor:
+            futureMap = {executor.submit(LookupTools.getVerse, passage): passage for passage in uniquePassageMap.values()}
+            for future in concurrent.futures.as_completed(futureMap):
+                try:
+                    resultMap[futureMap[future]] = future.result() != "Not Found"
+                except (requests.RequestException, ValueError, KeyError) as error:
+                    # Looked up again when its module is made
+                    print(f"\tWARNING : Verse [{futureMap[future]}] could not be prefetched; {error}")
+                    resultMap[futureMap[future]] = False
+
+        return resultMap
+
+    @staticmethod
+    def _getSession() -> requests.Session:
+        with LookupTools.sessionLock:
+            if LookupTools.session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=LookupTools.VersePrefetchWorkers)
+                session.mount("https://", adapter)
+                LookupTools.session = session
+            return LookupTools.session
+
 # ==============================================================================================
 # ============================================ TESTER ==========================================
 # ==============================================================================================
@@ -96,10 +184,23 @@ if __name__ == "__main__":
         verse = " ".join(sys.argv[2:])
         if verse:
             print(LookupTools.getVerse(verse))
+            print(f"\nPassage cache: {PassageCache.getStats()}")
     # python LookupTools.py -h [hymn name]
     elif (sys.argv[1] == "-h"):
         name = " ".join(sys.argv[2:])
         if name:
             hymn = LookupTools.getHymn(name)
-            print(hymn["title"] + "\n")
-            print(hymn["lyrics"])
+            if hymn["source"] == "None":
+                print(f"Hymn [{name}] not found, closest matches:")
+                for (hymnName, score) in LookupTools.getHymnSuggestions(name):
+                    print(f"  {score:.2f} {hymnName}")
+            else:
+                print(hymn["title"] + "\n")
+                print(hymn["lyrics"])
+    # python LookupTools.py -l [lyric line]
+    elif (sys.argv[1] == "-l"):
+        line = " ".join(sys.argv[2:])
+        if line:
+            with HymnDatabase.connect() as con:
+                for (hymnName, number, excerpt) in HymnSearch.searchLyrics(con, line):
+                    print(f"{hymnName} ({number}) : {excerpt}")
@@ -0,0 +1,162 @@
+import collections
+import sqlite3
+import zlib
+
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+"""
+
+Compression of the Hymn.Lyrics column, using a dictionary trained on the lyrics themselves.
+Verses are short, so most of the saving comes from the shared dictionary rather than from within a single verse.
+
+ - Compressed lyrics are stored as BLOBs: one byte holding the LyricsDictionary Id, followed by the compressed text
+ - Uncompressed lyrics remain TEXT, so plain and compressed rows can be mixed (i.e., rows added by SQL/SQLInsert.py)
+ - "zlib" (raw deflate with a preset dictionary) is always available, "zstd" needs the zstandard package
+
+The conversion is done offline with SQL/SQLCompressLyrics.py; reading goes through LyricsCodec.getDecoder(),
+or the lyricsText() SQL function once LyricsCodec.registerFunctions() is called.
+
+"""
+
+
+class LyricsCodec:
+    Codecs = ("zlib", "zstd")
+
+    # zlib only looks back 32 KB, so its dictionary cannot be any larger
+    MaxDictionarySize = 32 * 1024
+
+    # ==========================================================================================
+    # ======================================== DECODING ========================================
+    # ==========================================================================================
+
+    @staticmethod
+    def getDecoder(con: sqlite3.Connection) -> Callable[[Union[str, bytes]], str]:
+        # Returns a function turning a Lyrics value into text; dictionaries are loaded on first use
+        dictionaries: Dict[int, Tuple[str, bytes]] = {}
+
+        def decode(value: Union[str, bytes]) -> str:
+            if not isinstance(value, bytes):
+                return value
+
+            dictionaryID = value[0]
+            if dictionaryID not in dictionaries:
+                row = con.execute("SELECT Codec, Dictionary FROM LyricsDictionary WHERE Id = ?", (dictionaryID,)).fetchone()
+                if row is None:
+                    raise ValueError(f"Lyrics dictionary [{dictionaryID}] is missing.")
+                dictionaries[dictionaryID] = (row[0], row[1])
+
+            (codec, dictionary) = dictionaries[dictionaryID]
+            return LyricsCodec.decompress(codec, dictionary, value[1:])
+
+        return decode
+
+    @staticmethod
+    def registerFunctions(con: sqlite3.Connection) -> None:
+        # lyricsText(Lyrics) gives the text of a Lyrics value inside SQL, as used by the HymnSearch triggers
+        con.create_function("lyricsText", 1, LyricsCodec.getDecoder(con), deterministic=True)
+
+    @staticmethod
+    def decompress(codec: str, dictionary: bytes, data: bytes) -> str:
+        if codec == "zlib":
+            decompressor = zlib.decompressobj(-zlib.MAX_WBITS, zdict=dictionary)
+            return (decompressor.decompress(data) + decompressor.flush()).decode("utf8")
+
+        if codec == "zstd":
+            if zstandard is None:
+                raise ImportError("The zstandard package is needed to read this hymn database.")
+            return zstandard.ZstdDecompressor(dict_data=zstandard.ZstdCompressionDict(dictionary)).decompress(data).decode("utf8")
+
+        raise ValueError(f"Unknown lyrics codec [{codec}].")
+
+    @staticmethod
+    def getDictionaryID(value: Union[str, bytes]) -> Optional[int]:
+        # The LyricsDictionary Id a Lyrics value depends on, if any
+        return value[0] if isinstance(value, bytes) and len(value) > 0 else None
+
+    # ==========================================================================================
+    # ======================================== ENCODING ========================================
+    # ==========================================================================================
+
+    @staticmethod
+    def createDictionaryTable(con: sqlite3.Connection) -> None:
+        con.execute("CREATE TABLE IF NOT EXISTS LyricsDictionary(Id INTEGER PRIMARY KEY, Codec VARCHAR(16) NOT NULL, Dictionary BLOB NOT NULL)")
+
+    @staticmethod
+    def trainDictionary(codec: str, lyricsList: List[str]) -> bytes:
+        if codec == "zstd":
+            if zstandard is None:
+                raise ImportError("The zstandard package is needed for the zstd codec.")
+            return zstandard.train_dictionary(LyricsCodec.MaxDictionarySize, [lyrics.encode("utf8") for lyrics in lyricsList]).as_bytes()
+
+        # Lines and words repeated across verses, the most valuable ones placed last as deflate favors close matches
+        lineCounter = collections.Counter(line.strip() for lyrics in lyricsList for line in lyrics.split("\n") if line.strip())
+        wordCounter = collections.Counter(word for lyrics in lyricsList for word in lyrics.split())
+        candidates = [(count * len(line), line) for line, count in lineCounter.items() if count > 1]
+        candidates += [(count * len(word) / 4, word) for word, count in wordCounter.items() if count > 3]
+
+        parts: List[str] = []
+        size = 0
+        for _, part in sorted(candidates, reverse=True):
+            size += len(part.encode("utf8")) + 1
+            if size > LyricsCodec.MaxDictionarySize:
+                break
+            parts.append(part)
+
+        return "\n".join(reversed(parts)).encode("utf8")
+
+    @staticmethod
+    def compress(codec: str, dictionaryID: int, dictionary: bytes, lyrics: str, level: int = 9) -> bytes:
+        if codec == "zlib":
+            compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, 9, zlib.Z_DEFAULT_STRATEGY, dictionary)
+            data = compressor.compress(lyrics.encode("utf8")) + compressor.flush()
+        elif codec == "zstd":
+            if zstandard is None:
+                raise ImportError("The zstandard package is needed for the zstd codec.")
+            data = zstandard.ZstdCompressor(level=level, dict_data=zstandard.ZstdCompressionDict(dictionary)).compress(lyrics.encode("utf8"))
+        else:
+            raise ValueError(f"Unknown lyrics codec [{codec}].")
+
+        return bytes([dictionaryID]) + data
+
+# ==============================================================================================
+# ============================================ TESTER ==========================================
+# ==============================================================================================
+
+
+if __name__ == "__main__":
+    # python LyricsCodec.py, checks that every verse of the hymn database comes back unchanged once compressed
+    con = sqlite3.connect(":memory:")
+    sqlite3.connect("Data/HymnDatabase.db").backup(con)
+    decode = LyricsCodec.getDecoder(con)
+    lyricsList = [decode(row[0]) for row in con.execute("SELECT Lyrics FROM Hymn")]
+
+    LyricsCodec.createDictionaryTable(con)
+    for codec in LyricsCodec.Codecs:
+        if codec == "zstd" and zstandard is None:
+            print("\tINFO : zstandard is not installed, skipping the zstd codec.")
+            continue
+
+        dictionary = LyricsCodec.trainDictionary(codec, lyricsList)
+        assert len(dictionary) <= LyricsCodec.MaxDictionarySize
+        dictionaryID = con.execute("INSERT INTO LyricsDictionary (Codec, Dictionary) VALUES (?, ?)", (codec, dictionary)).lastrowid
+
+        compressedList = [LyricsCodec.compress(codec, dictionaryID, dictionary, lyrics) for lyrics in lyricsList]
+        assert all(LyricsCodec.getDictionaryID(compressed) == dictionaryID for compressed in compressedList)
+        assert [LyricsCodec.decompress(codec, dictionary, compressed[1:]) for compressed in compressedList] == lyricsList
+
+        # Plain and compressed values read back the same, in Python and in SQL
+        decode = LyricsCodec.getDecoder(con)
+        assert [decode(compressed) for compressed in compressedList] == lyricsList
+        assert decode(lyricsList[0]) == lyricsList[0] and LyricsCodec.getDictionaryID(lyricsList[0]) is None
+        LyricsCodec.registerFunctions(con)
+        assert con.execute("SELECT lyricsText(?), lyricsText(?)", (compressedList[0], lyricsList[0])).fetchone() == (lyricsList[0], lyricsList[0])
+
+        print(f"[{codec}] compressed [{sum(len(lyrics.encode('utf8')) for lyrics in lyricsList)}] bytes of lyrics into "
+              f"[{sum(len(compressed) for compressed in compressedList)}] bytes, with a [{len(dictionary)}] bytes dictionary.")
+
+    print("All lyrics passed.")
@@ -0,0 +1,106 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+
+from typing import Dict, Optional
+
+"""
+
+Cache of ESV passages (see LookupTools.getVerse), as the same references come back across slide types and weeks.
+
+ - Entries are keyed by the normalized reference (i.e., "john 3 : 16" -> "JOHN 3:16") and the request parameters
+ - Passages are kept in memory for the rest of the run, and on disk in Data/PassageCache.db across runs
+ - Entries expire after TimeToLiveSeconds; past MaxEntries, the least recently used ones are evicted
+ - Hit and miss counts are kept per run (getStats()) and per entry on disk
+
+"""
+
+
+class PassageCache:
+    CachePath = "Data/PassageCache.db"
+    TimeToLiveSeconds = 30 * 24 * 60 * 60
+    MaxEntries = 2000
+
+    memoryCache: Dict[str, str] = {}
+    stats = {"memoryHits": 0, "diskHits": 0, "misses": 0}
+    con: Optional[sqlite3.Connection] = None
+    lock = threading.Lock()
+
+    # ==========================================================================================
+    # ========================================== CACHE =========================================
+    # ==========================================================================================
+
+    @staticmethod
+    def get(passage: str, params: dict) -> Optional[str]:
+        key = PassageCache.getKey(passage, params)
+        with PassageCache.lock:
+            if key in PassageCache.memoryCache:
+                PassageCache.stats["memoryHits"] += 1
+                return PassageCache.memoryCache[key]
+
+            try:
+                con = PassageCache._getConnection()
+                row = con.execute("SELECT Passage FROM Passage WHERE Key = ? AND FetchedAt > ?",
+                                  (key, time.time() - PassageCache.TimeToLiveSeconds)).fetchone()
+                if row:
+                    with con:
+                        con.execute("UPDATE Passage SET LastUsedAt = ?, Hits = Hits + 1 WHERE Key = ?", (time.time(), key))
+            except sqlite3.Error as error:
+                print(f"\tWARNING : Passage cache could not be read; {error}")
+                row = None
+
+            if row is None:
+                PassageCache.stats["misses"] += 1
+                return None
+
+            PassageCache.stats["diskHits"] += 1
+            PassageCache.memoryCache[key] = row[0]
+            return row[0]
+
+    @staticmethod
+    def put(passage: str, params: dict, text: str) -> None:
+        key = PassageCache.getKey(passage, params)
+        with PassageCache.lock:
+            PassageCache.memoryCache[key] = text
+
+            try:
+                con = PassageCache._getConnection()
+                now = time.time()
+                with con:
+                    con.execute("INSERT OR REPLACE INTO Passage (Key, Passage, FetchedAt, LastUsedAt, Hits) VALUES (?, ?, ?, ?, 0)",
+                                (key, text, now, now))
+
+                    # Expired entries first, then the least recently used ones beyond the size limit
+                    con.execute("DELETE FROM Passage WHERE FetchedAt <= ?", (now - PassageCache.TimeToLiveSeconds,))
+                    con.execute("DELETE FROM Passage WHERE Key IN (SELECT Key FROM Passage ORDER BY LastUsedAt DESC LIMIT -1 OFFSET ?)",
+                                (PassageCache.MaxEntries,))
+            except sqlite3.Error as error:
+                print(f"\tWARNING : Passage cache could not be saved; {error}")
+
+    @staticmethod
+    def getStats() -> Dict[str, int]:
+        with PassageCache.lock:
+            return dict(PassageCache.stats)
+
+    @staticmethod
+    def getKey(passage: str, params: dict) -> str:
+        # "john 3 : 16-18" and "John 3:16 - 18" are the same passage; the reference itself is the "q" parameter
+        reference = re.sub(r"\s*([:\-–,;])\s*", r"\1", " ".join(passage.upper().split())).replace("–", "-")
+        return reference + " " + json.dumps({name: value for name, value in params.items() if name != "q"}, sort_keys=True)
+
+    # ==========================================================================================
+    # ======================================== DATABASE ========================================
+    # ==========================================================================================
+
+    @staticmethod
+    def _getConnection() -> sqlite3.Connection:
+        if PassageCache.con is None:
+            con = sqlite3.connect(PassageCache.CachePath, timeout=10, check_same_thread=False)
+            con.execute("PRAGMA journal_mode = WAL")
+            con.execute("CREATE TABLE IF NOT EXISTS Passage(Key TEXT PRIMARY KEY, Passage TEXT NOT NULL, FetchedAt REAL NOT NULL, "
+                        "LastUsedAt REAL NOT NULL, Hits INTEGER NOT NULL)")
+            con.execute("CREATE INDEX IF NOT EXISTS PassageLastUsedAt ON Passage(LastUsedAt)")
+            PassageCache.con = con
+        return PassageCache.con
@@ -0,0 +1,335 @@
+import copy
+import itertools
+import re
+
+from typing import Any, Dict, List, Optional, Tuple
+
+"""
+
+Local shadow of a Google Slides presentation.
+Mirrors the effect of the batchUpdate requests emitted by GoogleAPITools, so slide data
+can be read back after a commit without re-downloading the whole presentation.
+
+Only the request types emitted by GoogleAPITools are modelled; any other request type is ignored.
+Ranged (FIXED_RANGE) style updates are not tracked as they do not affect any getter.
+
+"""
+
+
+class PresentationModel:
+    # Source of revision numbers, unique across every model of the process
+    revisionCounter = itertools.count()
+
+    def __init__(self, presentation: dict) -> None:
+        self.presentation = presentation
+
+        # Changes whenever requests are applied; data derived from the model is valid for one revision
+        self.revision = next(PresentationModel.revisionCounter)
+
+        # For creating IDs of duplicated objects that were not given an explicit ID
+        self.dupIDCounter = 0
+
+        self.requestHandlers = {
+            "duplicateObject":          self._duplicateObject,
+            "deleteObject":             self._deleteObject,
+            "updateSlidesPosition":     self._updateSlidesPosition,
+            "insertText":               self._insertText,
+            "deleteText":               self._deleteText,
+            "replaceAllText":           self._replaceAllText,
+            "updateTextStyle":          self._updateTextStyle,
+            "updateParagraphStyle":     self._updateParagraphStyle,
+        }
+
+    # ==========================================================================================
+    # ========================================= GETTERS ========================================
+    # ==========================================================================================
+
+    def getSlides(self) -> List[dict]:
+        return self.presentation.setdefault("slides", [])
+
+    def getSlideIDList(self) -> List[str]:
+        return [slide["objectId"] for slide in self.getSlides()]
+
+    def findSlide(self, slideObjectID: str) -> Optional[dict]:
+        for slide in self.getSlides():
+            if slide["objectId"] == slideObjectID:
+                return slide
+        return None
+
+    def findPageElement(self, objectID: str) -> Optional[Tuple[dict, dict]]:
+        # Returns the (slide, page element) pair containing the object
+        for slide in self.getSlides():
+            for element in slide.get("pageElements", []):
+                if element.get("objectId") == objectID:
+                    return (slide, element)
+        return None
+
+    def getTextDict(self, objectID: str, cellLocation: Optional[dict] = None) -> Optional[dict]:
+        # Returns the "text" content of a shape or of a table cell
+        found = self.findPageElement(objectID)
+        if found is None:
+            return None
+
+        element = found[1]
+        if cellLocation is None:
+            return element.get("shape", {}).get("text")
+
+        try:
+            cell = element["table"]["tableRows"][cellLocation.get("rowIndex", 0)]["tableCells"][cellLocation.get("columnIndex", 0)]
+        except (KeyError, IndexError):
+            return None
+        return cell.get("text")
+
+    @staticmethod
+    def getFullText(textDict: Optional[dict]) -> str:
+        # Concatenates every text run of a text content
+        if not textDict:
+            return ""
+        return "".join(textElement["textRun"].get("content", "") for textElement in textDict.get("textElements", []) if "textRun" in textElement)
+
+    # ==========================================================================================
+    # ====================================== REQUEST REPLAY ====================================
+    # ==========================================================================================
+
+    def applyRequests(self, requests: List[dict]) -> None:
+        # Replay requests in order, the same way the Slides API would
+        self.revision = next(PresentationModel.revisionCounter)
+        for request in requests:
+            for requestType, body in request.items():
+                handler = self.requestHandlers.get(requestType)
+                if handler is not None:
+                    handler(body)
+
+    def _duplicateObject(self, body: dict) -> None:
+        # Duplicated slides are placed right after the source, as done by the Slides API
+        objectID = body["objectId"]
+        objectIDMapping = body.get("objectIds", {})
+        slides = self.getSlides()
+
+        for i, slide in enumerate(slides):
+            if slide["objectId"] == objectID:
+                newSlide = copy.deepcopy(slide)
+                newSlide["objectId"] = self._getDuplicateID(objectID, objectIDMapping)
+                for element in newSlide.get("pageElements", []):
+                    element["objectId"] = self._getDuplicateID(element.get("objectId", ""), objectIDMapping)
+                slides.insert(i + 1, newSlide)
+                return
+
+        found = self.findPageElement(objectID)
+        if found is not None:
+            (slide, element) = found
+            newElement = copy.deepcopy(element)
+            newElement["objectId"] = self._getDuplicateID(objectID, objectIDMapping)
+            elements = slide["pageElements"]
+            elements.insert(elements.index(element) + 1, newElement)
+
+    def _deleteObject(self, body: dict) -> None:
+        objectID = body["objectId"]
+        slides = self.getSlides()
+
+        for i, slide in enumerate(slides):
+            if slide["objectId"] == objectID:
+                slides.pop(i)
+                return
+
+        found = self.findPageElement(objectID)
+        if found is not None:
+            found[0]["pageElements"].remove(found[1])
+
+    def _updateSlidesPosition(self, body: dict) -> None:
+        # The insertion index is based on the slide arrangement before the move
+        slides = self.getSlides()
+        slideMap = {slide["objectId"]: slide for slide in slides}
+
+        newOrder = self.getMovedSlideOrder(self.getSlideIDList(), body["slideObjectIds"], body.get("insertionIndex", 0))
+        slides[:] = [slideMap[slideID] for slideID in newOrder]
+
+    def _insertText(self, body: dict) -> None:
+        textDict = self._getOrCreateTextDict(body["objectId"], body.get("cellLocation"))
+        if textDict is None:
+            return
+
+        text = self.getFullText(textDict)
+        index = min(body.get("insertionIndex", 0), len(text))
+        self._setText(textDict, text[:index] + body["text"] + text[index:])
+
+    def _deleteText(self, body: dict) -> None:
+        textDict = self.getTextDict(body["objectId"], body.get("cellLocation"))
+        if textDict is None:
+            return
+
+        text = self.getFullText(textDict)
+        (startIndex, endIndex) = self._getRange(body.get("textRange"), len(text))
+        self._setText(textDict, text[:startIndex] + text[endIndex:])
+
+    def _replaceAllText(self, body: dict) -> None:
+        containsText = body["containsText"]["text"]
+        matchCase = body["containsText"].get("matchCase", False)
+        pageObjectIDList = body.get("pageObjectIds", [])
+
+        pattern = re.compile(re.escape(containsText), 0 if matchCase else re.IGNORECASE)
+        for slide in self.getSlides():
+            if pageObjectIDList and slide["objectId"] not in pageObjectIDList:
+                continue
+
+            for textDict in self.getSlideTextDictList(slide):
+                text = self.getFullText(textDict)
+                if pattern.search(text):
+                    self._setText(textDict, pattern.sub(lambda _: body.get("replaceText", ""), text))
+
+    def _updateTextStyle(self, body: dict) -> None:
+        if not self.isAllRange(body.get("textRange")):
+            return
+
+        textDict = self.getTextDict(body["objectId"], body.get("cellLocation"))
+        if textDict is None:
+            return
+
+        for textElement in textDict.get("textElements", []):
+            if "textRun" in textElement:
+                textElement["textRun"]["style"] = self._applyStyle(textElement["textRun"].get("style", {}), body)
+
+    def _updateParagraphStyle(self, body: dict) -> None:
+        if not self.isAllRange(body.get("textRange")):
+            return
+
+        textDict = self.getTextDict(body["objectId"], body.get("cellLocation"))
+        if textDict is None:
+            return
+
+        for textElement in textDict.get("textElements", []):
+            if "paragraphMarker" in textElement:
+                textElement["paragraphMarker"]["style"] = self._applyStyle(textElement["paragraphMarker"].get("style", {}), body)
+
+    # ==========================================================================================
+    # ========================================== TOOLS =========================================
+    # ==========================================================================================
+
+    def _getDuplicateID(self, objectID: str, objectIDMapping: Dict[str, str]) -> str:
+        # The Slides API generates a random ID for objects missing from the mapping
+        if objectID in objectIDMapping:
+            return objectIDMapping[objectID]
+
+        self.dupIDCounter += 1
+        return f"{objectID}_local{self.dupIDCounter}"
+
+    def getSlideTextDictList(self, slide: dict) -> List[dict]:
+        # Text contents of every shape and table cell in a slide
+        textDictList = []
+        for element in slide.get("pageElements", []):
+            if "text" in element.get("shape", {}):
+                textDictList.append(element["shape"]["text"])
+            for row in element.get("table", {}).get("tableRows", []):
+                textDictList += [cell["text"] for cell in row.get("tableCells", []) if "text" in cell]
+        return textDictList
+
+    def _getOrCreateTextDict(self, objectID: str, cellLocation: Optional[dict]) -> Optional[dict]:
+        # Text can be inserted into a shape that has no text content yet
+        textDict = self.getTextDict(objectID, cellLocation)
+        if textDict is None and cellLocation is None:
+            found = self.findPageElement(objectID)
+            if found is not None and "shape" in found[1]:
+                textDict = found[1]["shape"].setdefault("text", {"textElements": []})
+        return textDict
+
+    def _setText(self, textDict: dict, text: str) -> None:
+        # Rebuild the text elements one paragraph at a time, keeping the leading paragraph and run style
+        textElements = textDict.get("textElements", [])
+        paragraphStyle = next((e["paragraphMarker"].get("style", {}) for e in textElements if "paragraphMarker" in e), {})
+        runStyle = next((e["textRun"].get("style", {}) for e in textElements if "textRun" in e), {})
+
+        # An emptied text content keeps its style for the next inserted text
+        newTextElements: List[Dict[str, Any]] = []
+        startIndex = 0
+        for paragraph in text.splitlines(keepends=True) or [""]:
+            endIndex = startIndex + len(paragraph)
+            newTextElements.append({"startIndex": startIndex, "endIndex": endIndex,
+                                    "paragraphMarker": {"style": copy.deepcopy(paragraphStyle)}})
+            newTextElements.append({"startIndex": startIndex, "endIndex": endIndex,
+                                    "textRun": {"content": paragraph, "style": copy.deepcopy(runStyle)}})
+            startIndex = endIndex
+
+        textDict["textElements"] = newTextElements
+
+    @staticmethod
+    def isAllRange(textRange: Optional[dict]) -> bool:
+        # Style requests without a text range apply to all the text
+        return textRange is None or textRange.get("type", "ALL") == "ALL"
+
+    @staticmethod
+    def _getRange(textRange: Optional[dict], textLength: int) -> Tuple[int, int]:
+        if PresentationModel.isAllRange(textRange):
+            return (0, textLength)
+
+        assert textRange is not None
+        startIndex = min(textRange.get("startIndex", 0), textLength)
+        if textRange.get("type") == "FROM_START_INDEX":
+            return (startIndex, textLength)
+        return (startIndex, min(textRange.get("endIndex", textLength), textLength))
+
+    @staticmethod
+    def _applyStyle(style: dict, body: dict) -> dict:
+        # Set the masked fields, fields that are masked but left unset are reset to their default
+        newStyle = dict(style)
+        for field in PresentationModel.getFieldList(body.get("fields", "")):
+            if field in body.get("style", {}):
+                newStyle[field] = copy.deepcopy(body["style"][field])
+            else:
+                newStyle.pop(field, None)
+        return newStyle
+
+    @staticmethod
+    def getMovedSlideOrder(slideIDOrder: List[str], movedSlideIDList: List[str], insertionIndex: int) -> List[str]:
+        # Slide order after moving a set of slides, the insertion index is based on the arrangement before the move
+        movedSlideIDSet = set(movedSlideIDList)
+        shift = len([slideID for slideID in slideIDOrder[:insertionIndex] if slideID in movedSlideIDSet])
+
+        remainingSlideIDList = [slideID for slideID in slideIDOrder if slideID not in movedSlideIDSet]
+        index = insertionIndex - shift
+        return remainingSlideIDList[:index] + [slideID for slideID in movedSlideIDList if slideID in slideIDOrder] + remainingSlideIDList[index:]
+
+    @staticmethod
+    def getFieldList(fields: str) -> List[str]:
+        # Splits a field mask such as "bold, italic, fontSize" into its fields
+        return [field.strip() for field in fields.split(",") if field.strip()]
+
+# ==============================================================================================
+# ============================================ TESTER ==========================================
+# ==============================================================================================
+
+
+if __name__ == "__main__":
+    # python PresentationModel.py, replays requests on a small hand-written presentation
+    def textSlide(slideID: str, objectID: str, text: str) -> dict:
+        return {"objectId": slideID, "pageElements": [{"objectId": objectID, "shape": {"text": {"textElements": [
+            {"startIndex": 0, "endIndex": len(text), "paragraphMarker": {"style": {"alignment": "CENTER"}}},
+            {"startIndex": 0, "endIndex": len(text), "textRun": {"content": text, "style": {"bold": True}}}]}}}]}
+
+    model = PresentationModel({"slides": [textSlide("title", "titleBox", "{Title}\n"), textSlide("hymn", "hymnBox", "{Lyrics}\n")]})
+    revision = model.revision
+
+    model.applyRequests([
+        {"duplicateObject": {"objectId": "hymn", "objectIds": {"hymn": "hymn2", "hymnBox": "hymnBox2"}}},
+        {"replaceAllText": {"replaceText": "Amazing Grace", "pageObjectIds": ["title"], "containsText": {"text": "{title}"}}},
+        {"deleteText": {"objectId": "hymnBox2", "textRange": {"type": "ALL"}}},
+        {"insertText": {"objectId": "hymnBox2", "text": "Was blind\nbut now I see", "insertionIndex": 0}},
+        {"updateTextStyle": {"objectId": "hymnBox2", "style": {"italic": True}, "fields": "bold,italic"}},
+        {"updateSlidesPosition": {"slideObjectIds": ["hymn2"], "insertionIndex": 0}},
+        {"deleteObject": {"objectId": "hymn"}},
+    ])
+
+    assert model.revision != revision
+    assert model.getSlideIDList() == ["hymn2", "title"], model.getSlideIDList()
+    assert PresentationModel.getFullText(model.getTextDict("titleBox")) == "Amazing Grace\n"
+    assert PresentationModel.getFullText(model.getTextDict("hymnBox2")) == "Was blind\nbut now I see"
+    assert model.findPageElement("hymnBox") is None
+
+    # Rebuilt paragraphs keep the paragraph style of the source, and the masked run style fields
+    textElements = model.getTextDict("hymnBox2")["textElements"]
+    assert [e["paragraphMarker"]["style"] for e in textElements if "paragraphMarker" in e] == [{"alignment": "CENTER"}] * 2
+    assert [e["textRun"]["style"] for e in textElements if "textRun" in e] == [{"italic": True}] * 2
+
+    assert PresentationModel.getMovedSlideOrder(["a", "b", "c", "d"], ["a", "b"], 3) == ["c", "a", "b", "d"]
+    assert PresentationModel.getFieldList(" bold, italic,,fontSize ") == ["bold", "italic", "fontSize"]
+
+    print("All requests passed.")
@@ -0,0 +1,140 @@
+import configparser
+import random
+import socket
+import threading
+import time
+
+from typing import Any, Callable, Dict
+from apiclient import errors
+
+import httplib2
+
+from GoogleSession import GoogleSession
+
+"""
+
+Single point of execution for every Google API request.
+Retries rate limited (429) and server side (5xx) errors with exponential backoff and jitter,
+and throttles write requests per service with a token bucket to stay within the per-minute quotas.
+Requests run on the calling thread's connection pool (see GoogleSession), which applies the configured timeout.
+
+Usage: RequestExecutor.execute(service.files().get(...), "drive") instead of service.files().get(...).execute()
+
+Requests that would be applied twice if sent again (i.e., files().copy) are executed with idempotent=False;
+a failed attempt may still have been applied on the server, so only the errors where it surely was not are retried.
+
+"""
+
+
+class RequestExecutor:
+    class TokenBucket:
+        # Allows "ratePerMinute" requests per minute, with bursts of up to a minute's worth of requests
+        def __init__(self, ratePerMinute: int) -> None:
+            self.capacity = float(ratePerMinute)
+            self.tokens = float(ratePerMinute)
+            self.refillPerSecond = ratePerMinute / 60.0
+            self.lastRefill = time.monotonic()
+            self.lock = threading.Lock()
+
+        def acquire(self) -> float:
+            # Take a token, waiting for one if needed; returns the time waited in seconds
+            waited = 0.0
+            while True:
+                with self.lock:
+                    now = time.monotonic()
+                    self.tokens = min(self.capacity, self.tokens + (now - self.lastRefill) * self.refillPerSecond)
+                    self.lastRefill = now
+
+                    if self.tokens >= 1.0:
+                        self.tokens -= 1.0
+                        return waited
+
+                    wait = (1.0 - self.tokens) / self.refillPerSecond
+
+                time.sleep(wait)
+                waited += wait
+
+    globalConfig = configparser.ConfigParser()
+    globalConfig.read("Data/GlobalProperties.ini")
+
+    maxRetries = globalConfig.getint("GOOGLE_API_SETTINGS", "ApiMaxRetries", fallback=5)
+    backoffBaseSeconds = globalConfig.getfloat("GOOGLE_API_SETTINGS", "ApiBackoffBaseSeconds", fallback=1.0)
+    backoffMaxSeconds = globalConfig.getfloat("GOOGLE_API_SETTINGS", "ApiBackoffMaxSeconds", fallback=32.0)
+
+    # Write quota token bucket per service, created on first use
+    writeBuckets: Dict[str, Any] = {}
+
+    # Status codes worth retrying; everything else is returned to the caller immediately
+    RetryableStatusCodes = (429, 500, 502, 503, 504)
+
+    # Errors that guarantee the request was not applied, the only ones retried for non-idempotent requests
+    NonIdempotentRetryableStatusCodes = (429,)
+    NonIdempotentRetryableErrors = (ConnectionRefusedError,)
+
+    # Statistics
+    statisticsLock = threading.Lock()
+    retryCount = 0
+    throttleCount = 0
+    throttleSeconds = 0.0
+
+    @staticmethod
+    def execute(request: Any, service: str, write: bool = False, idempotent: bool = True) -> Any:
+        # Executes a googleapiclient request; service is either "slides", "sheets", or "drive"
+        return RequestExecutor.call(lambda: request.execute(http=GoogleSession.getHttp()), service, write, idempotent)
+
+    @staticmethod
+    def call(function: Callable[[], Any], service: str, write: bool = False, idempotent: bool = True) -> Any:
+        # Calls a function that performs a single API request (i.e., MediaIoBaseDownload.next_chunk), retrying as needed
+        attempt = 0
+        while True:
+            if write:
+                RequestExecutor._throttle(service)
+
+            try:
+                return function()
+            except errors.HttpError as error:
+                retryableStatusCodes = RequestExecutor.RetryableStatusCodes if idempotent else RequestExecutor.NonIdempotentRetryableStatusCodes
+                if error.resp.status not in retryableStatusCodes or attempt >= RequestExecutor.maxRetries:
+                    raise
+                reason = f"HTTP {error.resp.status}"
+                retryAfter = error.resp.get("retry-after", "")
+            except (socket.timeout, TimeoutError, ConnectionError, httplib2.HttpLib2Error) as error:
+                # A timed out or dropped request may have been applied before the connection was lost
+                if (not idempotent and not isinstance(error, RequestExecutor.NonIdempotentRetryableErrors)) or attempt >= RequestExecutor.maxRetries:
+                    raise
+                reason = type(error).__name__
+                retryAfter = ""
+
+            # Exponential backoff with full jitter, unless the server says how long to wait
+            delay = random.uniform(0, min(RequestExecutor.backoffMaxSeconds, RequestExecutor.backoffBaseSeconds * 2 ** attempt))
+            if retryAfter.isdigit():
+                delay = max(delay, float(retryAfter))
+
+            with RequestExecutor.statisticsLock:
+                RequestExecutor.retryCount += 1
+
+            print(f"\tWARNING : {service.capitalize()} request failed ({reason}), retrying in {delay:.1f} seconds.")
+            time.sleep(delay)
+            attempt += 1
+
+    @staticmethod
+    def getStatistics() -> str:
+        return f"{RequestExecutor.retryCount} retries, {RequestExecutor.throttleCount} throttle waits ({RequestExecutor.throttleSeconds:.1f} seconds)"
+
+    @staticmethod
+    def _throttle(service: str) -> None:
+        # Write quota per service (i.e., "SlidesWritesPerMinute"), 0 disables throttling
+        with RequestExecutor.statisticsLock:
+            if service not in RequestExecutor.writeBuckets:
+                writesPerMinute = RequestExecutor.globalConfig.getint("GOOGLE_API_SETTINGS", service.capitalize() + "WritesPerMinute", fallback=0)
+                RequestExecutor.writeBuckets[service] = RequestExecutor.TokenBucket(writesPerMinute) if writesPerMinute > 0 else None
+            bucket = RequestExecutor.writeBuckets[service]
+
+        if bucket is None:
+            return
+
+        waited = bucket.acquire()
+        if waited > 0:
+            with RequestExecutor.statisticsLock:
+                RequestExecutor.throttleCount += 1
+                RequestExecutor.throttleSeconds += waited
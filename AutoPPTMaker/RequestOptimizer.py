@@ -0,0 +1,322 @@
+import copy
+import json
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from PresentationModel import PresentationModel
+
+"""
+
+Peephole optimizer for Slides batchUpdate request lists; run on the requests right before they are sent.
+The optimized list leaves the presentation in the same state as the original list.
+
+ - "deleteText" on a freshly duplicated object is dropped if its source object holds no text, and no earlier request changed it
+ - Style fields that the template already sets to the requested value are dropped
+ - Text and paragraph style updates on the same object and range are merged into one request, with a combined field mask
+ - Identical "replaceAllText" requests on different slides are merged into one request
+
+"""
+
+
+class RequestOptimizer:
+    # Style requests that can be merged together
+    StyleRequestTypes = ("updateTextStyle", "updateParagraphStyle")
+
+    # Requests that never change the text or style of a page element
+    NeutralRequestTypes = ("duplicateObject", "updateSlidesPosition", "updatePageElementTransform")
+
+    # Number of style requests and style fields skipped by dropTemplateStyles()
+    skippedStyleRequestCount = 0
+    skippedStyleFieldCount = 0
+
+    @staticmethod
+    def optimize(requests: List[dict], presentationModel: PresentationModel) -> List[dict]:
+        requests = RequestOptimizer.dropRedundantDeleteText(requests, presentationModel)
+        requests = RequestOptimizer.dropTemplateStyles(requests, presentationModel)
+        requests = RequestOptimizer.mergeStyleRequests(requests)
+        requests = RequestOptimizer.mergeReplaceAllText(requests)
+
+        return requests
+
+    # ==============================================================================================
+    # ========================================== PASSES ============================================
+    # ==============================================================================================
+
+    @staticmethod
+    def dropRedundantDeleteText(requests: List[dict], presentationModel: PresentationModel) -> List[dict]:
+        # Deleting the text of a duplicate whose source is empty does nothing
+        duplicateSourceMap: Dict[str, str] = {}
+        touchedObjectIDs = set()
+        optimizedRequests = []
+
+        for request in requests:
+            (requestType, body) = next(iter(request.items()))
+
+            if requestType == "duplicateObject":
+                for sourceObjectID, newObjectID in body.get("objectIds", {}).items():
+                    duplicateSourceMap[newObjectID] = sourceObjectID
+            elif requestType == "deleteText" and body["objectId"] in duplicateSourceMap and body["objectId"] not in touchedObjectIDs:
+                # The source text is only known from the presentation if no request of this batch changed it
+                sourceObjectID = duplicateSourceMap[body["objectId"]]
+                if sourceObjectID not in touchedObjectIDs and presentationModel.findPageElement(sourceObjectID) is not None:
+                    sourceTextDict = presentationModel.getTextDict(sourceObjectID, body.get("cellLocation"))
+                    if PresentationModel.getFullText(sourceTextDict).strip() == "":
+                        continue
+
+            if requestType in ("insertText", "deleteText", "replaceAllText"):
+                touchedObjectIDs.add(body.get("objectId"))
+                if requestType == "replaceAllText":
+                    # Page wide replacement, text of duplicates can no longer be inferred from their source
+                    duplicateSourceMap = {}
+
+            optimizedRequests.append(request)
+
+        return optimizedRequests
+
+    @staticmethod
+    def dropTemplateStyles(requests: List[dict], presentationModel: PresentationModel) -> List[dict]:
+        # Only send style fields that differ from the style already on the (source) object; limited to whole-text
+        # updates, where the new text inherits the style of the text it replaces.
+        # Template objects are assumed to not be restyled by uncommitted requests of an earlier batch.
+        duplicateSourceMap: Dict[str, str] = {}
+        styledFields: Dict[str, set] = {}
+        optimizedRequests = []
+
+        for request in requests:
+            (requestType, body) = next(iter(request.items()))
+
+            if requestType == "duplicateObject":
+                for sourceObjectID, newObjectID in body.get("objectIds", {}).items():
+                    duplicateSourceMap[newObjectID] = sourceObjectID
+            elif requestType in RequestOptimizer.StyleRequestTypes:
+                objectID = body["objectId"]
+                fields = PresentationModel.getFieldList(body.get("fields", ""))
+                touchedFields = styledFields.setdefault(objectID + requestType + json.dumps(body.get("cellLocation"), sort_keys=True), set())
+
+                if PresentationModel.isAllRange(body.get("textRange")):
+                    templateStyleList = RequestOptimizer._getTemplateStyleList(presentationModel, duplicateSourceMap.get(objectID, objectID),
+                                                                               body.get("cellLocation"), requestType)
+                    changedFields = [field for field in fields
+                                     if field in touchedFields or field not in body.get("style", {})
+                                     or not RequestOptimizer._isStyleFieldSet(templateStyleList, field, body["style"][field])]
+
+                    RequestOptimizer.skippedStyleFieldCount += len(fields) - len(changedFields)
+                    touchedFields.update(fields)
+
+                    if not changedFields:
+                        RequestOptimizer.skippedStyleRequestCount += 1
+                        continue
+
+                    if len(changedFields) < len(fields):
+                        request = {requestType: dict(body, fields=",".join(changedFields),
+                                                     style={field: body["style"][field] for field in changedFields if field in body["style"]})}
+                else:
+                    touchedFields.update(fields)
+
+            optimizedRequests.append(request)
+
+        return optimizedRequests
+
+    @staticmethod
+    def mergeStyleRequests(requests: List[dict]) -> List[dict]:
+        # Fold style updates into an earlier one on the same object and range, when no request in between
+        # changes the same object's text or the same style fields
+        optimizedRequests: List[dict] = []
+        openRequests: Dict[Tuple[str, str, str, str], dict] = {}
+
+        # Style fields set on the same object (and cell) since each open request, on any other range;
+        # merging moves a request back to the open one, so it must not skip over any of these fields
+        barrierFields: Dict[Tuple[str, str, str, str], set] = {}
+
+        for request in requests:
+            (requestType, body) = next(iter(request.items()))
+
+            if requestType in RequestOptimizer.StyleRequestTypes:
+                key = RequestOptimizer._getStyleKey(requestType, body)
+                fields = PresentationModel.getFieldList(body.get("fields", ""))
+
+                for openKey in openRequests:
+                    if openKey != key and openKey[1:3] == key[1:3]:
+                        barrierFields[openKey].update(fields)
+
+                if key in openRequests and not barrierFields[key] & set(fields):
+                    RequestOptimizer._mergeStyle(openRequests[key][requestType], body, fields)
+                    continue
+
+                request = copy.deepcopy(request)
+                openRequests[key] = request
+                barrierFields[key] = set()
+            elif requestType == "duplicateObject":
+                # The copies take the style of their source as of the duplication, later styles must not reach them
+                copiedObjectIDs = set(body.get("objectIds", {}).keys()) | {body["objectId"]}
+                openRequests = {openKey: openRequest for openKey, openRequest in openRequests.items() if openKey[1] not in copiedObjectIDs}
+            elif requestType not in RequestOptimizer.NeutralRequestTypes:
+                if "objectId" in body:
+                    openRequests = {openKey: openRequest for openKey, openRequest in openRequests.items() if openKey[1] != body["objectId"]}
+                else:
+                    openRequests = {}
+
+            optimizedRequests.append(request)
+
+        return optimizedRequests
+
+    @staticmethod
+    def mergeReplaceAllText(requests: List[dict]) -> List[dict]:
+        # Fold a placeholder replacement into an earlier identical one by extending its slide list; the slides must
+        # already exist at the earlier position, and no text holding the placeholder may be inserted in between
+        optimizedRequests: List[dict] = []
+        openRequests: Dict[Tuple[str, str], Tuple[int, dict]] = {}
+        createdSlideIndex: Dict[str, int] = {}
+
+        for request in requests:
+            (requestType, body) = next(iter(request.items()))
+
+            if requestType == "duplicateObject":
+                createdSlideIndex[body.get("objectIds", {}).get(body["objectId"], "")] = len(optimizedRequests)
+            elif requestType == "replaceAllText" and body.get("pageObjectIds"):
+                key = (json.dumps(body["containsText"], sort_keys=True), body.get("replaceText", ""))
+                if key in openRequests:
+                    (openIndex, openBody) = openRequests[key]
+                    if all(createdSlideIndex.get(slideID, -1) < openIndex for slideID in body["pageObjectIds"]):
+                        openBody["pageObjectIds"] += [slideID for slideID in body["pageObjectIds"] if slideID not in openBody["pageObjectIds"]]
+                        continue
+
+            if requestType in ("insertText", "replaceAllText"):
+                insertedText = body.get("text", body.get("replaceText", ""))
+                openRequests = {openKey: openRequest for openKey, openRequest in openRequests.items()
+                                if json.loads(openKey[0])["text"].lower() not in insertedText.lower()}
+
+            if requestType == "replaceAllText" and body.get("pageObjectIds"):
+                request = copy.deepcopy(request)
+                openRequests[key] = (len(optimizedRequests), request[requestType])
+
+            optimizedRequests.append(request)
+
+        return optimizedRequests
+
+    # ==============================================================================================
+    # =========================================== TOOLS ============================================
+    # ==============================================================================================
+
+    @staticmethod
+    def _getStyleKey(requestType: str, body: dict) -> Tuple[str, str, str, str]:
+        # Style requests without a text range apply to all the text
+        textRange = body.get("textRange", {"type": "ALL"})
+        return (requestType, body["objectId"], json.dumps(body.get("cellLocation"), sort_keys=True), json.dumps(textRange, sort_keys=True))
+
+    @staticmethod
+    def _getTemplateStyleList(presentationModel: PresentationModel, objectID: str, cellLocation: Optional[dict], requestType: str) -> List[dict]:
+        # Text run styles or paragraph styles of an object, as found in the presentation
+        textDict = presentationModel.getTextDict(objectID, cellLocation)
+        if not textDict:
+            return []
+
+        elementType = "textRun" if requestType == "updateTextStyle" else "paragraphMarker"
+        return [textElement[elementType].get("style", {}) for textElement in textDict.get("textElements", []) if elementType in textElement]
+
+    @staticmethod
+    def _isStyleFieldSet(templateStyleList: List[dict], field: str, value: Any) -> bool:
+        # Fields missing from a style are inherited, and are treated as unknown
+        return len(templateStyleList) > 0 and all(field in style and RequestOptimizer._isSameValue(style[field], value) for style in templateStyleList)
+
+    @staticmethod
+    def _isSameValue(value: Any, otherValue: Any) -> bool:
+        # Compares style values, ignoring int/float differences; unset color components are 0
+        if isinstance(value, dict) and isinstance(otherValue, dict):
+            if "rgbColor" in value or "rgbColor" in otherValue:
+                return all(RequestOptimizer._isSameValue(value.get("rgbColor", {}).get(color, 0.0), otherValue.get("rgbColor", {}).get(color, 0.0))
+                           for color in ("red", "green", "blue"))
+            return value.keys() == otherValue.keys() and all(RequestOptimizer._isSameValue(value[key], otherValue[key]) for key in value)
+
+        if isinstance(value, bool) or isinstance(otherValue, bool):
+            return value is otherValue
+
+        if isinstance(value, (int, float)) and isinstance(otherValue, (int, float)):
+            return abs(value - otherValue) < 1e-6
+
+        return bool(value == otherValue)
+
+    @staticmethod
+    def _mergeStyle(body: dict, laterBody: dict, laterFields: List[str]) -> None:
+        # Fields that are masked but left unset are reset to their default, so they are carried over as such
+        style = body.setdefault("style", {})
+        for field in laterFields:
+            if field in laterBody.get("style", {}):
+                style[field] = copy.deepcopy(laterBody["style"][field])
+            else:
+                style.pop(field, None)
+
+        fields = PresentationModel.getFieldList(body.get("fields", ""))
+        body["fields"] = ",".join(fields + [field for field in laterFields if field not in fields])
+
+# ==============================================================================================
+# ============================================ TESTER ==========================================
+# ==============================================================================================
+
+
+if __name__ == "__main__":
+    # python RequestOptimizer.py, checks the merge passes on hand-written request lists
+    def textStyle(objectID: str, fields: str, style: dict, textRange: Optional[dict] = None) -> dict:
+        body = {"objectId": objectID, "style": style, "fields": fields}
+        if textRange is not None:
+            body["textRange"] = textRange
+        return {"updateTextStyle": body}
+
+    fixedRange = {"type": "FIXED_RANGE", "startIndex": 0, "endIndex": 2}
+
+    # Style updates on the same object and range are merged into the first one
+    result = RequestOptimizer.mergeStyleRequests([textStyle("box", "fontSize", {"fontSize": {"magnitude": 20, "unit": "PT"}}),
+                                                  textStyle("box", "bold", {"bold": True})])
+    assert result == [textStyle("box", "fontSize,bold", {"fontSize": {"magnitude": 20, "unit": "PT"}, "bold": True})], result
+
+    # A later update cannot be moved back across an update of the same field on another range of the object
+    requests = [textStyle("box", "fontSize", {"fontSize": {"magnitude": 20, "unit": "PT"}}),
+                textStyle("box", "bold", {"bold": True}, fixedRange),
+                textStyle("box", "bold", {"bold": False})]
+    assert RequestOptimizer.mergeStyleRequests(requests) == requests, RequestOptimizer.mergeStyleRequests(requests)
+
+    # ... but can be when the fields in between are different, or on another object
+    requests = [textStyle("box", "fontSize", {"fontSize": {"magnitude": 20, "unit": "PT"}}),
+                textStyle("box", "italic", {"italic": True}, fixedRange),
+                textStyle("other", "bold", {"bold": True}),
+                textStyle("box", "bold", {"bold": False})]
+    result = RequestOptimizer.mergeStyleRequests(requests)
+    assert result == [textStyle("box", "fontSize,bold", {"fontSize": {"magnitude": 20, "unit": "PT"}, "bold": False})] + requests[1:3], result
+
+    # Text changes on the object end all merges into earlier requests
+    requests = [textStyle("box", "bold", {"bold": True}),
+                {"insertText": {"objectId": "box", "text": "Hymn", "insertionIndex": 0}},
+                textStyle("box", "italic", {"italic": True})]
+    assert RequestOptimizer.mergeStyleRequests(requests) == requests
+
+    # A style after a duplication must not be merged into one before it, where it would also apply to the copy
+    requests = [textStyle("box", "bold", {"bold": True}),
+                {"duplicateObject": {"objectId": "slide", "objectIds": {"slide": "slide2", "box": "box2"}}},
+                textStyle("box", "italic", {"italic": True})]
+    assert RequestOptimizer.mergeStyleRequests(requests) == requests, RequestOptimizer.mergeStyleRequests(requests)
+
+    # Deleting the text of a duplicate is only dropped while its source is known to be empty
+    model = PresentationModel({"slides": [{"objectId": "slide", "pageElements": [{"objectId": "box", "shape": {}}]}]})
+    duplicate = {"duplicateObject": {"objectId": "slide", "objectIds": {"slide": "slide2", "box": "box2"}}}
+    requests = [duplicate, {"deleteText": {"objectId": "box2", "textRange": {"type": "ALL"}}},
+                {"insertText": {"objectId": "box2", "text": "world", "insertionIndex": 0}}]
+    assert RequestOptimizer.dropRedundantDeleteText(requests, model) == [requests[0], requests[2]]
+
+    requests = [{"insertText": {"objectId": "box", "text": "hello", "insertionIndex": 0}}] + requests
+    assert RequestOptimizer.dropRedundantDeleteText(requests, model) == requests
+
+    requests = [{"duplicateObject": {"objectId": "slide2", "objectIds": {"slide2": "slide3", "box2": "box3"}}},
+                {"deleteText": {"objectId": "box3", "textRange": {"type": "ALL"}}}]
+    assert RequestOptimizer.dropRedundantDeleteText(requests, model) == requests
+
+    # The input list is left untouched
+    requests = [textStyle("box", "bold", {"bold": True}), textStyle("box", "italic", {"italic": True})]
+    RequestOptimizer.mergeStyleRequests(requests)
+    assert requests == [textStyle("box", "bold", {"bold": True}), textStyle("box", "italic", {"italic": True})]
+
+    requests = [{"replaceAllText": {"replaceText": "Hymn", "pageObjectIds": ["slide1"], "containsText": {"text": "{Title}", "matchCase": True}}},
+                {"replaceAllText": {"replaceText": "Hymn", "pageObjectIds": ["slide2"], "containsText": {"text": "{Title}", "matchCase": True}}}]
+    result = RequestOptimizer.mergeReplaceAllText(requests)
+    assert len(result) == 1 and result[0]["replaceAllText"]["pageObjectIds"] == ["slide1", "slide2"], result
+
+    print("All optimizations passed.")
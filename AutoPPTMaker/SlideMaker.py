@@ -12,7 +12,9 @@ from enum import Enum
 from HymnMaker import HymnMaker
 from GoogleAPITools import GoogleAPITools
 from ListMaker import ListMaker
+from LookupTools import LookupTools
 from Logging import Logging
+from RequestExecutor import RequestExecutor
 from Utility import Utility
 from VerseMaker import VerseMaker
 
@@ -128,6 +130,13 @@ class SlideMaker:
         # Read the entire global config section
         slideOrdering = dict(globalConfig.items(slideOrderModeValue))
 
+        # Look up all verses at once rather than one by one as each module is made
+        self._prefetchVerses(set(slideOrdering.values()))
+
+        # Generated slides in presentation order, and the number of modules that generated any
+        finalSlideIDList: List[str] = []
+        moduleCount = 0
+
         for i in range(len(slideOrdering.keys()), 0, -1):
             # Check if key number exists
             if not str(i) in slideOrdering:
@@ -147,15 +156,20 @@ class SlideMaker:
             else:
                 status, slideIDList = self.slideComponentCaller[slideType]()  # type: ignore
 
-            # Move slides to beginning
+            # Slides are arranged once all modules are done
             if slideIDList:
-                self.gEditor.moveSlideSet(slideIDList, 0)
+                finalSlideIDList = slideIDList + finalSlideIDList
+                moduleCount += 1
+
+            # Start sending this module's requests while the next module is being laid out
+            self.gEditor.flushRequests()
 
             print(f"  {slideType} : ".ljust(45), status.name)
 
-        # Get rid of template slides (recall commit doesn't been called yet)
-        for i in range(self.gEditor.getPresentationLength()):
-            self.gEditor.deleteSlide(self.gEditor.getSlideID(i))
+        # Get rid of template slides (recall commit doesn't been called yet) and put the generated slides in order;
+        # previously done with one move per module and one delete per template slide
+        requestCount = self.gEditor.arrangeSlides(finalSlideIDList)
+        print(f"\tINFO : Slide arrangement took {requestCount} requests instead of {moduleCount + self.gEditor.getPresentationLength()}.")
 
         # Commit slide modifications
         return self.gEditor.commitSlideChanges()
@@ -862,6 +876,29 @@ class SlideMaker:
     # ============================================ TOOLS ===================================================
     # ======================================================================================================
 
+    def _prefetchVerses(self, slideTypeSet: set) -> None:
+        # Verse sources of the enabled modules in this ordering, read the same way as the modules read them
+        sourceList: List[str] = []
+        if "MonthlyScripture" in slideTypeSet:
+            sourceList.append(self.input["MONTHLY_SCRIPTURE"]["MonthlyScriptureSource"].upper())
+        for (slideType, lastWeekString) in [("BibleMemorization", "LastWeek"), ("BibleMemorizationNextWeek", "")]:
+            if slideType in slideTypeSet and self.input["BIBLE_MEMORIZATION"]["BibleMemorization" + lastWeekString + "Enabled"].upper() == "TRUE":
+                sourceList += self.input["BIBLE_MEMORIZATION"]["BibleMemorization" + lastWeekString + "Source"].upper().split(",")
+        if "CallToWorship" in slideTypeSet and self.input["CALL_TO_WORSHIP"]["CallToWorshipEnabled"].upper() == "TRUE":
+            sourceList.append(self.input["CALL_TO_WORSHIP"]["CallToWorshipSource"].upper())
+        if "PrayerOfConfession" in slideTypeSet and self.input["PRAYER_OF_CONFESSION"]["PrayerOfConfessionEnabled"].upper() == "TRUE":
+            sourceList.append(self.input["PRAYER_OF_CONFESSION"]["PrayerOfConfessionSource"].upper())
+        if "SermonVerse" in slideTypeSet:
+            sourceList += self.input["SERMON_VERSE"]["SermonVerseSource"].upper().split(",")
+
+        start = time.perf_counter()
+        resultMap = LookupTools.prefetchVerses(sourceList)
+        print(f"\tINFO : Looked up {len(resultMap)} unique verses ({len([source for source in sourceList if source.strip()])} in total) "
+              f"in {time.perf_counter() - start:.2f} seconds.")
+        for source, found in resultMap.items():
+            if not found:
+                print(f"\tWARNING : Verse [{source}] was not found.")
+
     def _deleteSlide(self, slideIndexList: List[int]) -> bool:
         for slideIndex in slideIndexList:
             sourceSlideID = self.gEditor.getSlideID(slideIndex)
@@ -878,6 +915,9 @@ class SlideMaker:
     def _openSlideInBrowser(self) -> None:
         self.gEditor.openSlideInBrowser()
 
+    def _refillCopyPool(self) -> None:
+        self.gEditor.refillCopyPool()
+
     def _insertText(self, objectID: str, text: str, size: int, bold: bool, italic: bool, underlined: bool, alignment: str,
                     linespacing: int = -1, rgbColor: Tuple[float, float, float] = (1.0, 1.0, 1.0)) -> None:
         self.gEditor.setText(objectID, text)
@@ -951,10 +991,15 @@ Input Options:
 
             sm: SlideMaker = SlideMaker(seed)
             sm.setType(pptType)
-            sm.createSlide()
+            if not sm.createSlide():
+                print("ERROR : Slide changes could not be committed, the slides are incomplete.")
 
             print(f"OPENING {pptType.name.upper()} SLIDES...")
             sm._openSlideInBrowser()
 
-            print(f"\nTask completed in {(time.time() - start):.2f} seconds.\n")
+            # Copy the source presentation for the next run while the slides are being reviewed
+            sm._refillCopyPool()
+
+            print(f"\nGoogle API requests: {RequestExecutor.getStatistics()}.")
+            print(f"Task completed in {(time.time() - start):.2f} seconds.\n")
             print("====================================================================\n")
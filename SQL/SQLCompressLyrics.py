@@ -0,0 +1,81 @@
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, "AutoPPTMaker")
+from HymnSearch import HymnSearch
+from LyricsCodec import LyricsCodec
+
+# Run from the repository root to (re)compress the lyrics of the hymn database with a freshly trained dictionary:
+#   python SQL/SQLCompressLyrics.py [zlib|zstd|none]
+# "none" turns every verse back into plain text. Publish the database afterwards, as every row changes.
+
+DatabasePath = os.path.join("AutoPPTMaker", "Data", "HymnDatabase.db")
+
+if __name__ == '__main__':
+    try:
+        codec = sys.argv[1] if len(sys.argv) > 1 else "zlib"
+        if codec not in LyricsCodec.Codecs + ("none",):
+            raise ValueError(f"Unknown codec [{codec}], use one of {', '.join(LyricsCodec.Codecs + ('none',))}.")
+
+        originalSize = os.path.getsize(DatabasePath)
+
+        # ================================ READ LYRICS ================================
+
+        con = sqlite3.connect(DatabasePath)
+        LyricsCodec.createDictionaryTable(con)
+        LyricsCodec.registerFunctions(con)
+        decode = LyricsCodec.getDecoder(con)
+        rows = [(rowID, decode(lyrics)) for rowID, lyrics in con.execute("SELECT rowid, Lyrics FROM Hymn")]
+
+        # ============================== ENCODE LYRICS ================================
+
+        if codec == "none":
+            encodedRows = rows
+        else:
+            dictionaryID = con.execute("SELECT IFNULL(MAX(Id), 0) + 1 FROM LyricsDictionary").fetchone()[0]
+            if dictionaryID > 255:
+                raise ValueError("Too many lyrics dictionaries, convert the database back to plain text first.")
+
+            dictionary = LyricsCodec.trainDictionary(codec, [lyrics for _, lyrics in rows])
+            con.execute("INSERT INTO LyricsDictionary (Id, Codec, Dictionary) VALUES (?, ?, ?)", (dictionaryID, codec, dictionary))
+
+            # Verses that do not get any smaller are kept as text
+            encodedRows = []
+            for rowID, lyrics in rows:
+                data = LyricsCodec.compress(codec, dictionaryID, dictionary, lyrics)
+                encodedRows.append((rowID, data if len(data) < len(lyrics.encode("utf8")) else lyrics))
+
+        # ============================= UPDATE DATABASE ===============================
+
+        # Every row is checked to read back exactly before anything is stored
+        decode = LyricsCodec.getDecoder(con)
+        start = time.perf_counter()
+        for (rowID, lyrics), (_, value) in zip(rows, encodedRows):
+            if decode(value) != lyrics:
+                raise ValueError(f"Lyrics of row [{rowID}] do not decode back to the original text.")
+        decodeTime = time.perf_counter() - start
+
+        con.executemany("UPDATE Hymn SET Lyrics = ? WHERE rowid = ?", [(value, rowID) for rowID, value in encodedRows])
+        usedDictionaryIDs = {LyricsCodec.getDictionaryID(value) for _, value in encodedRows} - {None}
+        for (existingID,) in con.execute("SELECT Id FROM LyricsDictionary").fetchall():
+            if existingID not in usedDictionaryIDs:
+                con.execute("DELETE FROM LyricsDictionary WHERE Id = ?", (existingID,))
+
+        # Every verse went through the HymnSearch triggers, leaving the index fragmented
+        if HymnSearch.hasIndex(con):
+            con.execute("INSERT INTO HymnSearch (HymnSearch) VALUES ('optimize')")
+        con.commit()
+        con.execute("VACUUM")
+        con.close()
+
+        print(f"Successfully converted [{len(rows)}] verses to [{codec}], decoding all of them took {1000 * decodeTime:.1f} ms.")
+        print(f"Database size went from [{originalSize}] to [{os.path.getsize(DatabasePath)}] bytes.")
+
+    except FileNotFoundError:
+        print("The hymn database was not found, run this from the repository root.")
+    except sqlite3.Error as e:
+        print(f"Database error: {e}")
+    except Exception as e:
+        print(f"An error occurred: {e}")
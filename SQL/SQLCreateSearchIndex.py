@@ -0,0 +1,37 @@
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, "AutoPPTMaker")
+from HymnSearch import HymnSearch
+
+# Run from the repository root to create (or rebuild) the full-text search index of the hymn database:
+#   python SQL/SQLCreateSearchIndex.py
+# Triggers keep the index up to date from then on. Publish the database afterwards.
+
+DatabasePath = os.path.join("AutoPPTMaker", "Data", "HymnDatabase.db")
+
+if __name__ == '__main__':
+    try:
+        originalSize = os.path.getsize(DatabasePath)
+
+        # =============================== BUILD INDEX =================================
+
+        con = sqlite3.connect(DatabasePath)
+        start = time.perf_counter()
+        with con:
+            count = HymnSearch.createIndex(con)
+        buildTime = time.perf_counter() - start
+        con.execute("VACUUM")
+        con.close()
+
+        print(f"Successfully indexed [{count}] verses in {1000 * buildTime:.1f} ms.")
+        print(f"Database size went from [{originalSize}] to [{os.path.getsize(DatabasePath)}] bytes.")
+
+    except FileNotFoundError:
+        print("The hymn database was not found, run this from the repository root.")
+    except sqlite3.Error as e:
+        print(f"Database error: {e}")
+    except Exception as e:
+        print(f"An error occurred: {e}")
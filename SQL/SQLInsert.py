@@ -1,42 +1,134 @@
+import concurrent.futures
+import hashlib
+import os
 import sqlite3
+import sys
+import tarfile
+import time
+import zipfile
+
+from typing import List, Optional, Tuple
+
+sys.path.insert(0, "AutoPPTMaker")
+from HymnSearch import HymnSearch
+from LyricsCodec import LyricsCodec
+
+# Run from the repository root to add hymns to the hymn database:
+#   python SQL/SQLInsert.py [lyrics file, directory, .zip or .tar(.gz) archive]    (default: SQL/Lyrics.txt)
+# Every .txt file holds one hymn: its title, then its verses, separated by blank lines.
+# Hymns already in the database (same title or same lyrics) are skipped. Publish the database afterwards.
+
+DatabasePath = os.path.join("AutoPPTMaker", "Data", "HymnDatabase.db")
+DefaultLyricsPath = os.path.join("SQL", "Lyrics.txt")
+
+
+def readLyricsFiles(path: str) -> List[Tuple[str, bytes]]:
+    # (source name, content) of every lyrics file in the path
+    if os.path.isdir(path):
+        fileList = []
+        for directory, _, fileNames in os.walk(path):
+            for fileName in sorted(fileNames):
+                if fileName.lower().endswith(".txt"):
+                    with open(os.path.join(directory, fileName), "rb") as f:
+                        fileList.append((os.path.join(directory, fileName), f.read()))
+        return fileList
+
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            return [(name, archive.read(name)) for name in archive.namelist() if name.lower().endswith(".txt")]
+
+    if tarfile.is_tarfile(path):
+        with tarfile.open(path) as archive:
+            return [(member.name, archive.extractfile(member).read()) for member in archive.getmembers()
+                    if member.isfile() and member.name.lower().endswith(".txt")]
+
+    with open(path, "rb") as f:
+        return [(path, f.read())]
+
+
+def parseLyricsFile(lyricsFile: Tuple[str, bytes]) -> Tuple[str, Optional[str], List[str]]:
+    # (source name, hymn name, verses) of a lyrics file; the hymn name is None if the file has no verses
+    (sourceName, content) = lyricsFile
+    blockList = [block.strip() for block in content.decode("utf-8-sig").replace("\r\n", "\n").strip().split("\n\n")]
+    blockList = [block for block in blockList if block]
+    if len(blockList) < 2:
+        return (sourceName, None, [])
+    return (sourceName, blockList[0].upper(), blockList[1:])
+
+
+def getLyricsHash(verseList: List[str]) -> str:
+    # Same lyrics regardless of case, punctuation or line breaks
+    return hashlib.sha256("\n".join(HymnSearch.normalize(verse) for verse in verseList).encode("utf8")).hexdigest()
+
 
 if __name__ == '__main__':
     try:
-        # ============================== READ LYRICS FILE ==============================
+        start = time.perf_counter()
+        path = sys.argv[1] if len(sys.argv) > 1 else DefaultLyricsPath
+
+        # ============================== READ LYRICS FILES =============================
+
+        lyricsFileList = readLyricsFiles(path)
+        if not lyricsFileList:
+            raise ValueError(f"No lyrics files were found in [{path}].")
+
+        with concurrent.futures.ProcessPoolExecutor() as executor:
+            hymnList = list(executor.map(parseLyricsFile, lyricsFileList, chunksize=32))
+
+        # ================================ REMOVE DUPLICATES ===========================
+
+        con = sqlite3.connect(DatabasePath)
+        LyricsCodec.registerFunctions(con)
+
+        existingVerseMap: dict = {}
+        for (hymnName, lyrics) in con.execute("SELECT HymnName, lyricsText(Lyrics) FROM Hymn WHERE Version = 1 ORDER BY HymnName, Number"):
+            existingVerseMap.setdefault(hymnName, []).append(lyrics)
+        knownTitles = {HymnSearch.normalize(hymnName) for hymnName in existingVerseMap}
+        knownHashes = {getLyricsHash(verseList) for verseList in existingVerseMap.values()}
 
-        with open(r"SQL\Lyrics.txt", "r", encoding="utf8") as f:
-            lyrics = f.read().strip().split("\n\n")
+        rows = []
+        hymns = 0
+        for (sourceName, hymnName, verseList) in hymnList:
+            if hymnName is None:
+                print(f"Skipped [{sourceName}], it does not hold a title followed by verses.")
+                continue
 
-        if not lyrics:
-            raise ValueError("The lyrics file is empty or improperly formatted.")
+            lyricsHash = getLyricsHash(verseList)
+            if HymnSearch.normalize(hymnName) in knownTitles:
+                print(f"Skipped [{sourceName}], the hymn [{hymnName}] already exists in the database.")
+                continue
+            if lyricsHash in knownHashes:
+                print(f"Skipped [{sourceName}], the lyrics of [{hymnName}] already exist in the database.")
+                continue
 
-        hymnName = lyrics[0]
-        length = len(lyrics)
+            knownTitles.add(HymnSearch.normalize(hymnName))
+            knownHashes.add(lyricsHash)
+            hymns += 1
+            for i, verse in enumerate(verseList):
+                rows.append((hymnName, 1, i + 1, len(verseList), verse, ""))
 
-		# ========================== INSERT LYRICS INTO DATABASE =======================
+        # ========================== INSERT LYRICS INTO DATABASE =======================
 
-        # Connect to the SQLite database
-        with sqlite3.connect(r'AutoPPTMaker\Data\HymnDatabase.db') as con:
-            cursor = con.cursor()
+        # WAL only for the import; the database is published as a single file
+        insertStart = time.perf_counter()
+        con.execute("PRAGMA journal_mode = WAL")
+        with con:
+            con.executemany("INSERT INTO Hymn (HymnName, Version, Number, End, Lyrics, Comments) VALUES (?, ?, ?, ?, ?, ?)", rows)
 
-			# Check if the hymn already exists in the database
-            cursor.execute("SELECT * FROM Hymn WHERE hymnName = ?", (hymnName.upper(),))
-            if cursor.fetchone():
-                raise ValueError(f"The hymn [{hymnName}] already exists in the database.")
+            # The HymnSearch triggers indexed every new verse, merge their index segments
+            if rows and HymnSearch.hasIndex(con):
+                con.execute("INSERT INTO HymnSearch (HymnSearch) VALUES ('optimize')")
+        insertTime = time.perf_counter() - insertStart
 
-            # Insert verses into the database
-            for i in range(1, length):
-                cursor.execute(
-                    "INSERT INTO Hymn (HymnName, Version, Number, End, Lyrics, Comments) "
-                    "VALUES (?, ?, ?, ?, ?, ?)",
-                    (hymnName.upper(), 1, i, length - 1, lyrics[i], "")
-                )
-            con.commit()
+        con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        con.execute("PRAGMA journal_mode = DELETE")
+        con.close()
 
-        print(f"Successfully inserted [{length - 1}] verses of [{hymnName}] into the database.")
+        print(f"Successfully inserted [{len(rows)}] verses of [{hymns}] hymns from [{len(lyricsFileList)}] files "
+              f"in {time.perf_counter() - start:.2f} seconds ({len(rows) / max(insertTime, 1e-9):.0f} rows/s inserted).")
 
-    except FileNotFoundError:
-        print("The specified lyrics file was not found.")
+    except FileNotFoundError as e:
+        print(f"The specified lyrics file was not found: {e.filename}")
     except sqlite3.Error as e:
         print(f"Database error: {e}")
     except Exception as e:
@@ -0,0 +1,48 @@
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, "AutoPPTMaker")
+from HymnDatabaseDelta import HymnDatabaseDelta
+
+# Run from the repository root after changing the hymn database (i.e., with SQLInsert.py), then upload both
+# HymnDatabase.db and HymnDatabaseChangeset.jsonl to their Google Drive files. Clients apply the changeset
+# instead of downloading the whole database, as long as they are at the previously published version.
+
+DatabasePath = os.path.join("AutoPPTMaker", "Data", "HymnDatabase.db")
+ChangesetPath = os.path.join("SQL", "HymnDatabaseChangeset.jsonl")
+
+if __name__ == '__main__':
+    try:
+        # ============================== CREATE CHANGESET ==============================
+
+        with sqlite3.connect(DatabasePath) as con:
+            header, operations = HymnDatabaseDelta.createChangeset(con)
+            con.commit()
+        con.close()
+
+        # ========================== TIE CHANGESET TO DATABASE =========================
+
+        # The database file is final once the row hash table is committed
+        md5 = hashlib.md5()
+        with open(DatabasePath, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                md5.update(block)
+        header["databaseMd5"] = md5.hexdigest()
+
+        with open(ChangesetPath, "w", encoding="utf8") as f:
+            f.write(json.dumps(header) + "\n")
+            for operation in operations:
+                f.write(json.dumps(operation, ensure_ascii=False) + "\n")
+
+        print(f"Successfully published [{len(operations)}] changed rows to [{ChangesetPath}].")
+        print("Upload both the database and the changeset to Google Drive.")
+
+    except FileNotFoundError:
+        print("The hymn database was not found, run this from the repository root.")
+    except sqlite3.Error as e:
+        print(f"Database error: {e}")
+    except Exception as e:
+        print(f"An error occurred: {e}")